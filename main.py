@@ -2,44 +2,158 @@
 """CLI entry: invoke the agentic graph with a user request."""
 
 import argparse
+import sys
 from pathlib import Path
 
-from dotenv import load_dotenv
+from src.startup import StartupProfile
 
-from langchain_core.messages import HumanMessage
 
-from src.logging_.visual import print_summary, print_trajectory_table
-from src.orchestrator import build_graph
+def run_request(graph, request: str, workspace_path: Path, recursion_limit: int) -> dict:
+    """Invoke a compiled graph for one request, print the summary and record its metrics."""
+    import sqlite3
+    import time
 
-load_dotenv()
+    from langchain_core.messages import HumanMessage
 
+    from src.approvals import review_pending
+    from src.logging_.metrics_db import record_run
+    from src.logging_.trajectory import get_store, new_store, release_store
+    from src.logging_.visual import print_summary, print_trajectory_table
 
-def main() -> None:
-    parser = argparse.ArgumentParser(description="Run the coding agent PoC (Plan → Act → Observe)")
-    parser.add_argument("request", nargs="?", default="List all Python files in the workspace", help="User request")
-    parser.add_argument("--workspace", "-w", default="./workspace", help="Workspace directory (default: ./workspace)")
-    parser.add_argument("--recursion-limit", type=int, default=20, help="Max graph steps (default: 20)")
-    args = parser.parse_args()
-    workspace_path = Path(args.workspace).resolve()
-    workspace_path.mkdir(parents=True, exist_ok=True)
-    graph = build_graph(str(workspace_path))
+    handle = new_store()
     initial = {
-        "user_request": args.request,
+        "user_request": request,
         "workspace_path": str(workspace_path),
-        "messages": [HumanMessage(content=args.request)],
+        "messages": [HumanMessage(content=request)],
         "loop_count": 0,
         "current_phase": "plan",
         "context_snippets": [],
         "verification_result": {},
         "trajectory": [],
+        "trajectory_handle": handle,
         "edit_attempts": 0,
         "edit_applied": 0,
         "latency_breakdown": {},
+        "token_usage": {},
     }
-    config = {"recursion_limit": args.recursion_limit}
-    result = graph.invoke(initial, config=config)
-    print_summary(result)
-    print_trajectory_table(result.get("trajectory") or [], last_n=15)
+    config = {"recursion_limit": recursion_limit}
+    started = time.time()
+    try:
+        try:
+            result = graph.invoke(initial, config=config)
+        finally:
+            # Staged edits are reviewed even if the run fails part-way
+            staged = review_pending(str(workspace_path))
+        result["staged_changes"] = staged
+        print_summary(result)
+        store = get_store(handle)
+        print_trajectory_table(store, last_n=15)
+        try:
+            record_run(result, store, str(workspace_path), started)
+        except (sqlite3.Error, OSError) as e:
+            # A read-only or locked metrics store must not fail a finished run
+            print(f"warning: run metrics not recorded: {e}", file=sys.stderr)
+    finally:
+        release_store(handle)
+    return result
+
+
+def run_worker(workspace_path: Path, recursion_limit: int) -> None:
+    """Warm worker: read one request per stdin line and reuse the compiled graph and tools.
+
+    Edits are confirmed on /dev/tty only; without a terminal they are rejected (auto-approve
+    rules still apply).
+    """
+    from src.orchestrator import get_graph
+
+    print("worker ready: one request per line (EOF to quit)", flush=True)
+    for line in sys.stdin:
+        request = line.strip()
+        if not request:
+            continue
+        try:
+            run_request(get_graph(str(workspace_path)), request, workspace_path, recursion_limit)
+        except Exception as e:
+            # One failing request must not take down the warm worker
+            print(f"error: request failed: {type(e).__name__}: {e}", flush=True)
+        print("worker ready", flush=True)
+
+
+def stats_main(argv: list[str]) -> None:
+    """`main.py stats`: aggregate recorded runs (percentiles, trends, tier/workspace breakdowns)."""
+    parser = argparse.ArgumentParser(prog="main.py stats", description="Aggregate metrics across recorded runs")
+    parser.add_argument("--since-days", type=float, default=None, help="Only runs started in the last N days")
+    parser.add_argument("--workspace", "-w", default=None, help="Only runs for this workspace")
+    args = parser.parse_args(argv)
+
+    from src.logging_.metrics_db import compute_stats
+    from src.logging_.visual import print_stats
+
+    print_stats(compute_stats(since_days=args.since_days, workspace=args.workspace))
+
+
+def main() -> None:
+    if sys.argv[1:2] == ["stats"]:
+        stats_main(sys.argv[2:])
+        return
+    parser = argparse.ArgumentParser(description="Run the coding agent PoC (Plan → Act → Observe)")
+    parser.add_argument("request", nargs="?", default="List all Python files in the workspace", help="User request")
+    parser.add_argument("--workspace", "-w", default="./workspace", help="Workspace directory (default: ./workspace)")
+    parser.add_argument("--recursion-limit", type=int, default=20, help="Max graph steps (default: 20)")
+    parser.add_argument(
+        "--approval",
+        choices=["interactive", "staged"],
+        default="interactive",
+        help="interactive: confirm each edit; staged: keep working and review all edits at the end",
+    )
+    parser.add_argument(
+        "--auto-approve",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help="Apply edits to matching paths without review (repeatable, e.g. 'tests/*')",
+    )
+    parser.add_argument(
+        "--auto-approve-max-lines",
+        type=int,
+        default=200,
+        help="Largest auto-approved change, in changed lines (default: 200)",
+    )
+    parser.add_argument("--profile-startup", action="store_true", help="Report import/compile timings and exit")
+    parser.add_argument("--worker", action="store_true", help="Keep the graph warm and read requests from stdin")
+    args = parser.parse_args()
+    workspace_path = Path(args.workspace).resolve()
+    workspace_path.mkdir(parents=True, exist_ok=True)
+
+    profile = StartupProfile()
+    with profile.stage("dotenv"):
+        from dotenv import load_dotenv
+        load_dotenv()
+    # The orchestrator needs the whole graph stack; importing it piecewise first only
+    # attributes the cost to each package in the --profile-startup table.
+    with profile.stage("import langchain_core"):
+        import langchain_core.messages  # noqa: F401
+    with profile.stage("import langgraph"):
+        import langgraph.graph  # noqa: F401
+    with profile.stage("import rich"):
+        import rich.console  # noqa: F401
+    with profile.stage("import orchestrator"):
+        from src.orchestrator import get_graph
+    with profile.stage("build + compile graph"):
+        graph = get_graph(str(workspace_path))
+    from src.approvals import ApprovalPolicy, configure_approvals
+    # stdin carries the worker's requests, so approvals must never be read from it
+    configure_approvals(
+        str(workspace_path),
+        ApprovalPolicy(args.approval, tuple(args.auto_approve), args.auto_approve_max_lines, tty_only=args.worker),
+    )
+    if args.profile_startup:
+        print(profile.report())
+        return
+    if args.worker:
+        run_worker(workspace_path, args.recursion_limit)
+        return
+    run_request(graph, args.request, workspace_path, args.recursion_limit)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,172 @@
+"""Approval policy for file edits: interactive prompts, auto-approve rules or a staged overlay.
+
+interactive (default): every edit is confirmed on the spot, as before.
+staged: edits go to a WorkspaceOverlay without blocking; reads, greps, shell commands and
+        verify runs see them; files a shell command writes in the shadow copy are staged too.
+        They are reviewed as one batch at the end of the run and committed atomically or
+        rolled back.
+In both modes, edits matching the auto-approve path globs and size limit skip review.
+"""
+
+import difflib
+from fnmatch import fnmatch
+from pathlib import Path
+
+from src.overlay import WorkspaceOverlay
+from src.tools.diff_utils import ask_user_confirmation, generate_diff, generate_new_file_preview
+
+APPROVAL_MODES = ("interactive", "staged")
+DEFAULT_MAX_AUTO_LINES = 200
+
+
+class ApprovalPolicy:
+    """How edits are approved for one workspace."""
+
+    def __init__(
+        self,
+        mode: str = "interactive",
+        auto_approve: tuple[str, ...] = (),
+        max_auto_lines: int = DEFAULT_MAX_AUTO_LINES,
+        tty_only: bool = False,
+    ):
+        if mode not in APPROVAL_MODES:
+            raise ValueError(f"unknown approval mode: {mode}")
+        self.mode = mode
+        self.auto_approve = tuple(auto_approve)
+        self.max_auto_lines = max_auto_lines
+        # Confirm only on /dev/tty, never stdin (set when stdin carries requests, e.g. --worker)
+        self.tty_only = tty_only
+
+    def auto_approves(self, rel_path: str, old: str | None, new: str) -> bool:
+        """True if rel_path matches an auto-approve glob and the change is small enough."""
+        if not any(fnmatch(rel_path, pattern) for pattern in self.auto_approve):
+            return False
+        return changed_lines(old, new) <= self.max_auto_lines
+
+
+def changed_lines(old: str | None, new: str) -> int:
+    """Count added plus removed lines between old and new, as a line diff would show them."""
+    matcher = difflib.SequenceMatcher(None, (old or "").splitlines(), new.splitlines(), autojunk=False)
+    return sum(i2 - i1 + j2 - j1 for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != "equal")
+
+
+_policies: dict[str, ApprovalPolicy] = {}
+_overlays: dict[str, WorkspaceOverlay] = {}
+
+
+def _key(workspace_root: str) -> str:
+    return str(Path(workspace_root or ".").resolve())
+
+
+def configure_approvals(workspace_root: str, policy: ApprovalPolicy) -> None:
+    """Set the approval policy for a workspace (creates its overlay in staged mode)."""
+    key = _key(workspace_root)
+    _policies[key] = policy
+    if policy.mode == "staged":
+        _overlays.setdefault(key, WorkspaceOverlay(key))
+    else:
+        _overlays.pop(key, None)
+
+
+def get_policy(workspace_root: str) -> ApprovalPolicy:
+    return _policies.get(_key(workspace_root)) or ApprovalPolicy()
+
+
+def get_overlay(workspace_root: str) -> WorkspaceOverlay | None:
+    """Return the workspace overlay in staged mode, else None."""
+    return _overlays.get(_key(workspace_root))
+
+
+def read_staged(workspace_root: str, full_path: Path) -> str | None:
+    """Return staged content for full_path if any (reads must prefer it over disk)."""
+    overlay = get_overlay(workspace_root)
+    return overlay.get(full_path) if overlay else None
+
+
+def execution_dir(workspace_root: str) -> Path:
+    """Directory commands should run in: a shadow copy with staged files applied, if any are pending."""
+    overlay = get_overlay(workspace_root)
+    if overlay and len(overlay):
+        return overlay.materialize()
+    return Path(workspace_root or ".").resolve()
+
+
+def absorb_execution_changes(workspace_root: str, exec_dir: Path) -> tuple[list[str], list[str]]:
+    """Stage files a command changed in the shadow copy returned by execution_dir.
+
+    Returns (staged, not carried over) as workspace-relative paths; both are empty when the
+    command ran in the real workspace.
+    """
+    overlay = get_overlay(workspace_root)
+    if overlay is None or Path(exec_dir).resolve() == overlay.root:
+        return [], []
+    staged, skipped = overlay.absorb(Path(exec_dir))
+    return sorted(str(p.relative_to(overlay.root)) for p in staged), [str(p.relative_to(overlay.root)) for p in skipped]
+
+
+def submit_change(
+    workspace_root: str,
+    file_path: str,
+    full_path: Path,
+    old_content: str | None,
+    new_content: str,
+    action_desc: str,
+    applied_msg: str,
+) -> str:
+    """Route one edit through the workspace's approval policy and return the tool result."""
+    policy = get_policy(workspace_root)
+    overlay = get_overlay(workspace_root)
+    try:
+        rel_path = str(full_path.relative_to(Path(workspace_root or ".").resolve()))
+    except ValueError:
+        return f"error: file path must be inside workspace: {file_path}"
+    auto = policy.auto_approves(rel_path, old_content, new_content)
+    if overlay is not None and not auto:
+        overlay.stage(full_path, new_content)
+        return f"{applied_msg} (staged for batch review; later reads, greps and tests see it)"
+    if not auto:
+        if old_content is None:
+            diff_output = generate_new_file_preview(new_content, file_path)
+        else:
+            diff_output = generate_diff(old_content, new_content, file_path)
+        if not ask_user_confirmation(diff_output, action_desc, tty_only=policy.tty_only):
+            return "rejected: user declined the changes"
+    if overlay is not None:
+        # An auto-approved write lands on disk; drop any older staged version of the file
+        overlay.discard([full_path])
+    try:
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        full_path.write_text(new_content, encoding="utf-8")
+    except Exception as e:
+        return f"error: could not write file: {e}"
+    return applied_msg
+
+
+def review_pending(workspace_root: str) -> dict[str, int]:
+    """Show all staged diffs as one batch, then commit them atomically or roll them back.
+
+    Returns {"committed": n, "rolled_back": n}.
+    """
+    overlay = get_overlay(workspace_root)
+    if overlay is None or not len(overlay):
+        return {"committed": 0, "rolled_back": 0}
+    root = overlay.root
+    diffs = []
+    for change in overlay.changes.values():
+        rel = str(change.path.relative_to(root))
+        if change.base is None:
+            diffs.append(generate_new_file_preview(change.content, rel))
+        else:
+            diffs.append(generate_diff(change.base, change.content, rel))
+    count = len(overlay)
+    confirmed = ask_user_confirmation(
+        "\n".join(diffs), f"Commit {count} staged change(s) to the workspace", tty_only=get_policy(workspace_root).tty_only
+    )
+    if confirmed:
+        try:
+            overlay.commit()
+            return {"committed": count, "rolled_back": 0}
+        except RuntimeError as e:
+            print(f"Staged changes not committed: {e}")
+    overlay.discard()
+    return {"committed": 0, "rolled_back": count}
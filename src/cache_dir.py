@@ -0,0 +1,25 @@
+"""Per-workspace cache directories kept outside the workspace itself."""
+
+import hashlib
+import os
+from pathlib import Path
+
+DEFAULT_CACHE_ROOT = Path.home() / ".cache" / "cursor-clone-poc"
+
+
+def cache_root() -> Path:
+    """Return the cache root (AGENT_CACHE_DIR if set, else ~/.cache/cursor-clone-poc)."""
+    return Path(os.environ.get("AGENT_CACHE_DIR") or DEFAULT_CACHE_ROOT).expanduser()
+
+
+def workspace_cache_dir(workspace_root: str, name: str) -> Path:
+    """Return (and create) the cache subdirectory `name` for a workspace.
+
+    Caches live under the cache root keyed by the resolved workspace path, so they never
+    show up in the workspace's own file listing, grep results or test runs.
+    """
+    root = Path(workspace_root or ".").resolve()
+    key = hashlib.sha1(str(root).encode("utf-8")).hexdigest()[:16]
+    path = cache_root() / key / name
+    path.mkdir(parents=True, exist_ok=True)
+    return path
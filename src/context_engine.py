@@ -1,12 +1,50 @@
-"""Context engine node: mock retrieval of relevant snippets from workspace."""
+"""Context engine node: retrieval of relevant snippets from workspace (keyword + optional vector index)."""
 
+import os
 from pathlib import Path
 
 from src.state import AgentState
+from src.workspace_files import walk_files
+
+RRF_K = 60
+SEMANTIC_TOP_K = 20
+# Same file types as vector_index.INDEXED_EXTENSIONS (not imported: numpy is optional)
+TEXT_EXTENSIONS = (".py", ".md", ".txt")
+_indexes: dict[str, object] = {}
+
+
+def _semantic_enabled() -> bool:
+    """Vector retrieval is on unless AGENT_RETRIEVAL=keyword."""
+    return os.environ.get("AGENT_RETRIEVAL", "hybrid").lower() != "keyword"
+
+
+def _get_vector_index(root: Path):
+    """Return the workspace VectorIndex (cached per process), or None if numpy is not installed."""
+    key = str(root)
+    if key not in _indexes:
+        try:
+            from src.cache_dir import workspace_cache_dir
+            from src.vector_index import VectorIndex
+        except ImportError:
+            _indexes[key] = None
+        else:
+            _indexes[key] = VectorIndex(key, workspace_cache_dir(key, "vectors"))
+    return _indexes[key]
+
+
+def _semantic_hits(root: Path, query: str) -> list[tuple[float, str, int, int]]:
+    """Return vector-index hits for query, refreshing changed files first."""
+    if not _semantic_enabled() or not query:
+        return []
+    index = _get_vector_index(root)
+    if index is None:
+        return []
+    index.update()
+    return index.query(query, k=SEMANTIC_TOP_K)
 
 
 def context_engine_node(state: AgentState) -> dict:
-    """Retrieve top-k snippets from workspace by simple keyword match against user_request."""
+    """Retrieve top-k snippets from workspace by keyword match fused with vector similarity."""
     workspace_path = state.get("workspace_path") or "."
     user_request = (state.get("user_request") or "").strip()
     root = Path(workspace_path).resolve()
@@ -17,23 +55,41 @@ def context_engine_node(state: AgentState) -> dict:
     total_chars = 0
     max_chars = 8000
     scored: list[tuple[int, str, str]] = []
-    
-    for ext in ("*.py", "*.md", "*.txt"):
-        for f in root.rglob(ext):
-            if not f.is_file():
-                continue
-            try:
-                text = f.read_text(encoding="utf-8", errors="replace")
-            except Exception:
-                continue
-            score = sum(1 for k in keywords if k in text.lower())
-            if score > 0:
-                rel = f.relative_to(root)
-                excerpt = text[:500].replace("\n", " ")
-                scored.append((score, str(rel), excerpt))
+    texts: dict[str, str] = {}
+
+    for f in walk_files(root):
+        if f.suffix not in TEXT_EXTENSIONS:
+            continue
+        try:
+            text = f.read_text(encoding="utf-8", errors="replace")
+        except Exception:
+            continue
+        rel = str(f.relative_to(root))
+        texts[rel] = text
+        score = sum(1 for k in keywords if k in text.lower())
+        if score > 0:
+            excerpt = text[:500].replace("\n", " ")
+            scored.append((score, rel, excerpt))
     scored.sort(key=lambda x: -x[0])
-    
-    for _, rel, excerpt in scored:
+
+    # Reciprocal rank fusion of keyword ranking and best-chunk vector ranking per file
+    fused: dict[str, float] = {}
+    excerpts: dict[str, str] = {}
+    for rank, (_, rel, excerpt) in enumerate(scored):
+        fused[rel] = fused.get(rel, 0.0) + 1.0 / (RRF_K + rank)
+        excerpts[rel] = excerpt
+    seen: set[str] = set()
+    for _, rel, start, end in _semantic_hits(root, user_request):
+        if rel in seen or rel not in texts:
+            continue
+        fused[rel] = fused.get(rel, 0.0) + 1.0 / (RRF_K + len(seen))
+        seen.add(rel)
+        lines = texts[rel].splitlines()[start - 1:end]
+        excerpts[rel] = f"(lines {start}-{end}) " + "\n".join(lines)[:500].replace("\n", " ")
+    ranked = sorted(fused, key=lambda r: -fused[r])
+
+    for rel in ranked:
+        excerpt = excerpts[rel]
         if total_chars + len(excerpt) > max_chars:
             break
         snippets.append(f"[{rel}]\n{excerpt}")
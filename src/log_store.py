@@ -0,0 +1,42 @@
+"""Off-prompt storage for full command logs, fetchable on demand by id."""
+
+import re
+import time
+import uuid
+from pathlib import Path
+
+from src.cache_dir import workspace_cache_dir
+
+MAX_LOGS = 50
+_LOG_ID_RE = re.compile(r"^[0-9a-f]{12}$")
+
+
+def _log_dir(workspace_root: str) -> Path:
+    return workspace_cache_dir(workspace_root, "logs")
+
+
+def save_log(workspace_root: str, text: str) -> str:
+    """Store text and return its log id. Keeps only the newest MAX_LOGS logs."""
+    log_dir = _log_dir(workspace_root)
+    log_id = uuid.uuid4().hex[:12]
+    (log_dir / f"{log_id}.log").write_text(text, encoding="utf-8")
+    logs = sorted(log_dir.glob("*.log"), key=lambda p: p.stat().st_mtime)
+    for old in logs[:-MAX_LOGS]:
+        old.unlink(missing_ok=True)
+    return log_id
+
+
+def new_log_path(workspace_root: str, suffix: str) -> Path:
+    """Return a fresh path in the log dir for tool-written artifacts (e.g. JUnit XML)."""
+    return _log_dir(workspace_root) / f"{uuid.uuid4().hex[:12]}-{int(time.time())}{suffix}"
+
+
+def load_log(workspace_root: str, log_id: str) -> str | None:
+    """Return the stored log text, or None if the id is unknown or malformed."""
+    if not _LOG_ID_RE.match(log_id or ""):
+        return None
+    path = _log_dir(workspace_root) / f"{log_id}.log"
+    try:
+        return path.read_text(encoding="utf-8")
+    except OSError:
+        return None
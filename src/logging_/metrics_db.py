@@ -0,0 +1,201 @@
+"""Cross-run metrics store (SQLite) and aggregation for `main.py stats`.
+
+Each run appends one row to `runs` plus its per-call samples (model calls, verify runs,
+node and tool latencies) to `samples`. Stats are aggregated in Python so percentiles
+work on any SQLite build.
+"""
+
+import math
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+from src.cache_dir import cache_root
+from src.logging_.trajectory import TrajectoryStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started REAL NOT NULL,
+    finished REAL NOT NULL,
+    workspace TEXT NOT NULL,
+    model_tier TEXT NOT NULL,
+    escalated INTEGER NOT NULL DEFAULT 0,
+    loops INTEGER NOT NULL,
+    edit_attempts INTEGER NOT NULL,
+    edit_applied INTEGER NOT NULL,
+    passed INTEGER NOT NULL,
+    model_calls INTEGER NOT NULL,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    cache_read_tokens INTEGER NOT NULL,
+    total_ms INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS samples (
+    run_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value REAL NOT NULL,
+    ts REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS samples_run ON samples(run_id);
+CREATE INDEX IF NOT EXISTS runs_started ON runs(started);
+"""
+
+
+def db_path() -> Path | None:
+    """AGENT_METRICS_DB: path to the SQLite file, or "off"; default <cache root>/metrics.sqlite3."""
+    value = os.environ.get("AGENT_METRICS_DB", "")
+    if value.lower() == "off":
+        return None
+    return Path(value).expanduser() if value else cache_root() / "metrics.sqlite3"
+
+
+RUN_COLUMNS = (
+    "run_id", "started", "finished", "workspace", "model_tier", "escalated", "loops", "edit_attempts",
+    "edit_applied", "passed", "model_calls", "input_tokens", "output_tokens", "cache_read_tokens", "total_ms",
+)
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(runs)")}
+    if "escalated" not in columns:
+        # Stores created before the column existed
+        conn.execute("ALTER TABLE runs ADD COLUMN escalated INTEGER NOT NULL DEFAULT 0")
+    return conn
+
+
+def record_run(state: dict, store: TrajectoryStore, workspace: str, started: float) -> str | None:
+    """Append one run and its metric samples. Returns the run id, or None if disabled.
+
+    model_tier is the router's initial tier (runs are grouped by it); escalated marks runs
+    whose tier was raised mid-run by the stall detector. Raises sqlite3.Error / OSError if
+    the store cannot be written.
+    """
+    path = db_path()
+    if path is None:
+        return None
+    run_id = state.get("trajectory_handle") or f"run-{int(started * 1000)}"
+    usage = state.get("token_usage") or {}
+    finished = time.time()
+    final_tier = state.get("model_tier") or "fast"
+    initial_tier = state.get("initial_model_tier") or final_tier
+    conn = connect(path)
+    try:
+        with conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO runs ({', '.join(RUN_COLUMNS)}) VALUES ({', '.join('?' * len(RUN_COLUMNS))})",
+                (
+                    run_id,
+                    started,
+                    finished,
+                    str(workspace),
+                    initial_tier,
+                    int(final_tier != initial_tier),
+                    state.get("loop_count") or 0,
+                    state.get("edit_attempts") or 0,
+                    state.get("edit_applied") or 0,
+                    int(bool((state.get("verification_result") or {}).get("passed"))),
+                    usage.get("calls", 0),
+                    usage.get("input_tokens", 0),
+                    usage.get("output_tokens", 0),
+                    usage.get("cache_read_tokens", 0),
+                    int((finished - started) * 1000),
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO samples VALUES (?, ?, ?, ?)",
+                [(run_id, m.name, m.value, m.timestamp) for m in store.metrics],
+            )
+    finally:
+        conn.close()
+    return run_id
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of values (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _summarize(values: list[float]) -> dict[str, float]:
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+    }
+
+
+def _run_summary(rows: list[sqlite3.Row]) -> dict[str, float]:
+    n = len(rows)
+    attempts = sum(r["edit_attempts"] for r in rows)
+    inputs = sum(r["input_tokens"] for r in rows)
+    return {
+        "runs": n,
+        "pass_rate": sum(r["passed"] for r in rows) / n if n else 0.0,
+        "escalated_rate": sum(r["escalated"] for r in rows) / n if n else 0.0,
+        "avg_loops": sum(r["loops"] for r in rows) / n if n else 0.0,
+        "edit_accuracy": sum(r["edit_applied"] for r in rows) / attempts if attempts else 0.0,
+        "avg_tokens": sum(r["input_tokens"] + r["output_tokens"] for r in rows) / n if n else 0.0,
+        "cached_share": sum(r["cache_read_tokens"] for r in rows) / inputs if inputs else 0.0,
+        **{f"total_ms_{k}": v for k, v in _summarize([r["total_ms"] for r in rows]).items() if k != "count"},
+    }
+
+
+def compute_stats(since_days: float | None = None, workspace: str | None = None, path: Path | None = None) -> dict:
+    """Aggregate stored runs.
+
+    Returns {"overall": run summary, "metrics": {name: percentiles},
+             "trend": {name: (older p50, newer p50)}, "by_tier": {...}, "by_workspace": {...}}.
+    The trend compares the older and newer halves of the selected runs by start time.
+    """
+    path = path or db_path()
+    if path is None or not path.is_file():
+        return {"overall": _run_summary([]), "metrics": {}, "trend": {}, "by_tier": {}, "by_workspace": {}}
+    conn = connect(path)
+    conn.row_factory = sqlite3.Row
+    where, params = [], []
+    if since_days is not None:
+        where.append("started >= ?")
+        params.append(time.time() - since_days * 86400)
+    if workspace:
+        where.append("workspace = ?")
+        params.append(str(Path(workspace).resolve()))
+    clause = f"WHERE {' AND '.join(where)}" if where else ""
+    runs = conn.execute(f"SELECT * FROM runs {clause} ORDER BY started", params).fetchall()
+    run_ids = [r["run_id"] for r in runs]
+    samples: dict[str, list[tuple[str, float]]] = {}
+    for chunk_start in range(0, len(run_ids), 500):
+        chunk = run_ids[chunk_start:chunk_start + 500]
+        marks = ",".join("?" * len(chunk))
+        for row in conn.execute(f"SELECT run_id, name, value FROM samples WHERE run_id IN ({marks})", chunk):
+            samples.setdefault(row["name"], []).append((row["run_id"], row["value"]))
+    conn.close()
+
+    newer = set(run_ids[len(run_ids) // 2:])
+    metrics = {name: _summarize([v for _, v in vals]) for name, vals in sorted(samples.items())}
+    trend = {}
+    for name, vals in sorted(samples.items()):
+        old = [v for rid, v in vals if rid not in newer]
+        new = [v for rid, v in vals if rid in newer]
+        if old and new:
+            trend[name] = (percentile(old, 50), percentile(new, 50))
+    by_tier: dict[str, list] = {}
+    by_workspace: dict[str, list] = {}
+    for r in runs:
+        by_tier.setdefault(r["model_tier"], []).append(r)
+        by_workspace.setdefault(r["workspace"], []).append(r)
+    return {
+        "overall": _run_summary(runs),
+        "metrics": metrics,
+        "trend": trend,
+        "by_tier": {k: _run_summary(v) for k, v in sorted(by_tier.items())},
+        "by_workspace": {k: _run_summary(v) for k, v in sorted(by_workspace.items())},
+    }
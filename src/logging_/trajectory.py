@@ -1,16 +1,120 @@
-"""Trajectory trace: append action sequence entries to state."""
+"""Trajectory trace: out-of-band append-only store plus a bounded recent window in state.
 
+The full trace lives in a process-local TrajectoryStore (compact __slots__ records with
+interned phase/action/metric names). Graph state only carries the store handle and the
+last few entries, so LangGraph does not copy an ever-growing list at every step.
+"""
+
+import sys
 import time
-from typing import Any
-
-
-def append_trajectory(phase: str, action: str, detail: str = "") -> dict[str, Any]:
-    """Return a state update that appends one trajectory entry (use with reducer)."""
-    return {
-        "trajectory": [{
-            "phase": phase,
-            "action": action,
-            "detail": detail[:200] if detail else "",
-            "timestamp": time.time(),
-        }]
-    }
+import uuid
+from typing import TYPE_CHECKING, Any, Iterator
+
+if TYPE_CHECKING:
+    from src.state import AgentState
+
+
+class TrajectoryRecord:
+    """One trajectory step."""
+
+    __slots__ = ("phase", "action", "detail", "timestamp")
+
+    def __init__(self, phase: str, action: str, detail: str, timestamp: float):
+        self.phase = sys.intern(phase)
+        self.action = sys.intern(action)
+        self.detail = detail
+        self.timestamp = timestamp
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"phase": self.phase, "action": self.action, "detail": self.detail, "timestamp": self.timestamp}
+
+
+class MetricEvent:
+    """One timing/count sample (e.g. a single model call's latency)."""
+
+    __slots__ = ("name", "value", "timestamp")
+
+    def __init__(self, name: str, value: float, timestamp: float):
+        self.name = sys.intern(name)
+        self.value = value
+        self.timestamp = timestamp
+
+
+class TrajectoryStore:
+    """Append-only trajectory and metric event log for one run."""
+
+    __slots__ = ("records", "metrics")
+
+    def __init__(self) -> None:
+        self.records: list[TrajectoryRecord] = []
+        self.metrics: list[MetricEvent] = []
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[TrajectoryRecord]:
+        return iter(self.records)
+
+    def append(self, phase: str, action: str, detail: str = "") -> TrajectoryRecord:
+        record = TrajectoryRecord(phase, action, detail[:200] if detail else "", time.time())
+        self.records.append(record)
+        return record
+
+    def record_metric(self, name: str, value: float) -> None:
+        self.metrics.append(MetricEvent(name, value, time.time()))
+
+    def tail(self, n: int) -> list[TrajectoryRecord]:
+        return self.records[-n:] if n > 0 else []
+
+    def metric_totals(self) -> dict[str, tuple[int, float]]:
+        """Return {metric name: (sample count, sum of values)} in first-seen order."""
+        totals: dict[str, tuple[int, float]] = {}
+        for m in self.metrics:
+            count, total = totals.get(m.name, (0, 0.0))
+            totals[m.name] = (count + 1, total + m.value)
+        return totals
+
+
+_stores: dict[str, TrajectoryStore] = {}
+
+
+def new_store() -> str:
+    """Create a store for a new run and return its handle (put it in state as trajectory_handle)."""
+    handle = uuid.uuid4().hex
+    _stores[handle] = TrajectoryStore()
+    return handle
+
+
+def get_store(handle: str | None) -> TrajectoryStore:
+    """Return the store for handle. Raises KeyError if the handle is missing or was released."""
+    store = _stores.get(handle or "")
+    if store is None:
+        raise KeyError(f"no trajectory store for handle {handle!r}; create one with new_store()")
+    return store
+
+
+def ensure_store(state: "AgentState") -> dict[str, Any]:
+    """Return a state update with a fresh trajectory_handle if state has no live store, else {}.
+
+    The graph's entry node calls this, so an invocation without a handle still gets its own
+    store; the caller releases it via the handle in the result.
+    """
+    if state.get("trajectory_handle") in _stores:
+        return {}
+    return {"trajectory_handle": new_store()}
+
+
+def release_store(handle: str | None) -> None:
+    """Drop a run's store once its summary has been reported."""
+    _stores.pop(handle or "", None)
+
+
+def append_trajectory(state: "AgentState", phase: str, action: str, detail: str = "") -> dict[str, Any]:
+    """Append one entry to the run's store; return a state update for the recent window (use with reducer)."""
+    record = get_store(state.get("trajectory_handle")).append(phase, action, detail)
+    return {"trajectory": [record.as_dict()]}
+
+
+def record_metric(state: "AgentState", name: str, value: float) -> None:
+    """Record one metric sample for the run (kept out of graph state)."""
+    get_store(state.get("trajectory_handle")).record_metric(name, value)
@@ -1,17 +1,20 @@
 """Rich console: state transitions, loop count, summary table."""
 
-from typing import Any
+from typing import TYPE_CHECKING
 
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
 
-from src.state import AgentState
+from src.logging_.trajectory import TrajectoryStore, get_store
+
+if TYPE_CHECKING:
+    from src.state import AgentState
 
 console = Console()
 
 
-def log_state_transition(node_name: str, state: AgentState) -> None:
+def log_state_transition(node_name: str, state: "AgentState") -> None:
     """Print current node, phase, and loop count."""
     phase = state.get("current_phase", "?")
     loop = state.get("loop_count", 0)
@@ -24,24 +27,20 @@ def log_state_transition(node_name: str, state: AgentState) -> None:
     )
 
 
-def print_trajectory_table(trajectory: list[dict[str, Any]], last_n: int = 10) -> None:
-    """Print last N trajectory steps as a table."""
-    if not trajectory:
+def print_trajectory_table(store: TrajectoryStore, last_n: int = 10) -> None:
+    """Print last N trajectory steps from the run's store as a table."""
+    if not len(store):
         return
     table = Table(title="Trajectory (last steps)")
     table.add_column("Phase", style="cyan")
     table.add_column("Action", style="green")
     table.add_column("Detail", style="dim", max_width=40)
-    for entry in trajectory[-last_n:]:
-        table.add_row(
-            entry.get("phase", ""),
-            entry.get("action", ""),
-            (entry.get("detail", "") or "")[:40],
-        )
+    for record in store.tail(last_n):
+        table.add_row(record.phase, record.action, (record.detail or "")[:40])
     console.print(table)
 
 
-def print_summary(state: AgentState) -> None:
+def print_summary(state: "AgentState") -> None:
     """Print edit accuracy, latency breakdown, total steps."""
     table = Table(title="Run Summary")
     table.add_column("Metric", style="cyan")
@@ -51,9 +50,72 @@ def print_summary(state: AgentState) -> None:
     table.add_row("Edit applied", str(applied))
     if attempts > 0:
         table.add_row("Edit accuracy", f"{100 * applied / attempts:.0f}%")
-    lb = state.get("latency_breakdown") or {}
-    for k, v in lb.items():
-        table.add_row(f"Latency {k}", f"{v}ms")
+    store = get_store(state.get("trajectory_handle"))
+    for name, (count, total) in store.metric_totals().items():
+        # Per-node and per-tool samples are aggregated by `main.py stats`
+        if ":" not in name:
+            table.add_row(f"Latency {name}", f"{total:.0f}ms ({count}x)")
+    usage = state.get("token_usage") or {}
+    if usage:
+        table.add_row("Model calls", str(usage.get("calls", 0)))
+        table.add_row("Input tokens", str(usage.get("input_tokens", 0)))
+        table.add_row("Cached input tokens", str(usage.get("cache_read_tokens", 0)))
+        table.add_row("Output tokens", str(usage.get("output_tokens", 0)))
+    staged = state.get("staged_changes") or {}
+    if staged.get("committed") or staged.get("rolled_back"):
+        table.add_row("Staged edits committed", str(staged.get("committed", 0)))
+        table.add_row("Staged edits rolled back", str(staged.get("rolled_back", 0)))
+    if state.get("tool_cache_hits"):
+        table.add_row("Tool cache hits", str(state["tool_cache_hits"]))
     table.add_row("Loop count", str(state.get("loop_count", 0)))
-    table.add_row("Trajectory steps", str(len(state.get("trajectory") or [])))
+    progress = state.get("progress") or {}
+    if progress.get("stopped"):
+        table.add_row("Stopped early", progress["stopped"])
+        table.add_row("Model calls saved (est.)", str(progress.get("saved_calls", 0)))
+    table.add_row("Trajectory steps", str(len(store)))
     console.print(Panel(table, title="Summary", border_style="green"))
+
+
+def _pct(value: float) -> str:
+    return f"{100 * value:.0f}%"
+
+
+def print_stats(stats: dict) -> None:
+    """Print cross-run aggregates from metrics_db.compute_stats."""
+    overall = stats.get("overall") or {}
+    if not overall.get("runs"):
+        console.print("No runs recorded yet.")
+        return
+
+    table = Table(title="Latency percentiles (ms)")
+    for col in ("Metric", "Count", "p50", "p95", "p99", "Trend p50"):
+        table.add_column(col, style="cyan" if col == "Metric" else "green", justify="left" if col == "Metric" else "right")
+    table.add_row(
+        "run total", str(overall["runs"]),
+        f"{overall['total_ms_p50']:.0f}", f"{overall['total_ms_p95']:.0f}", f"{overall['total_ms_p99']:.0f}", "",
+    )
+    trend = stats.get("trend") or {}
+    for name, p in (stats.get("metrics") or {}).items():
+        change = ""
+        if name in trend:
+            old, new = trend[name]
+            if old:
+                delta = 100 * (new - old) / old
+                style = "red" if delta > 10 else "green" if delta < -10 else "dim"
+                change = f"[{style}]{delta:+.0f}%[/{style}]"
+        table.add_row(name, str(p["count"]), f"{p['p50']:.0f}", f"{p['p95']:.0f}", f"{p['p99']:.0f}", change)
+    console.print(table)
+
+    for title, groups in (("By model tier", stats.get("by_tier")), ("By workspace", stats.get("by_workspace"))):
+        if not groups:
+            continue
+        table = Table(title=title)
+        for col in ("Group", "Runs", "Pass", "Escalated", "Loops", "Edit acc.", "Tokens", "Cached", "p50 ms", "p95 ms"):
+            table.add_column(col, style="cyan" if col == "Group" else "green")
+        for group, s in groups.items():
+            table.add_row(
+                group, str(s["runs"]), _pct(s["pass_rate"]), _pct(s["escalated_rate"]), f"{s['avg_loops']:.1f}",
+                _pct(s["edit_accuracy"]),
+                f"{s['avg_tokens']:.0f}", _pct(s["cached_share"]), f"{s['total_ms_p50']:.0f}", f"{s['total_ms_p95']:.0f}",
+            )
+        console.print(table)
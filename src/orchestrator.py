@@ -1,27 +1,41 @@
 """Orchestrator: build and compile the Plan → Act → Observe graph."""
 
 import os
+import shlex
 import time
-from pathlib import Path
+from functools import lru_cache
 from typing import Literal
 
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
 from langgraph.graph import END, START, StateGraph
 
+from src.approvals import execution_dir
 from src.context_engine import context_engine_node
-from src.logging_.trajectory import append_trajectory
+from src.log_store import new_log_path, save_log
+from src.logging_.trajectory import append_trajectory, record_metric
 from src.logging_.visual import log_state_transition
+from src.progress import ESCALATE_STRIKES, HINTS, STOP_STRIKES, check_progress
+from src.prompt import (
+    accumulate_token_usage,
+    assemble_prompt,
+    build_repo_map,
+    extract_token_usage,
+    supports_cache_markers,
+)
 from src.router import router_node
 from src.sandbox import run_command
 from src.state import AgentState
+from src.test_digest import distill, format_digest
+from src.tool_cache import ToolResultCache
 from src.tool_harness import get_tools, get_tool_node
 
 MAX_LOOPS = 10
-VERIFY_COMMAND = "python -m pytest --tb=short -q 2>/dev/null || true"
+VERIFY_COMMAND = "python -m pytest --tb=short -q --junitxml={junit_xml} 2>/dev/null || true"
 
 
+@lru_cache(maxsize=None)
 def _get_llm(model_tier: Literal["high", "fast"]):
-    """Return chat model: Gemini if GOOGLE_API_KEY is set, else OpenAI."""
+    """Return chat model: Gemini if GOOGLE_API_KEY is set, else OpenAI (provider imported lazily, once)."""
     if os.environ.get("GOOGLE_API_KEY"):
         from langchain_google_genai import ChatGoogleGenerativeAI
         # Use Gemini 2.5 models (latest generation)
@@ -35,88 +49,88 @@ def _get_llm(model_tier: Literal["high", "fast"]):
 def build_plan_node(workspace_root: str):
     """Build plan node with workspace-bound tools."""
     tools = get_tools(workspace_root)
+    bound: dict[str, tuple] = {}
 
     def plan_node(state: AgentState) -> dict:
         log_state_transition("plan", state)
         model_tier = state.get("model_tier") or "fast"
-        llm = _get_llm(model_tier).bind_tools(tools)
-        snippets = state.get("context_snippets") or []
-        context_blob = "\n\n".join(snippets[:10]) if snippets else "(no context)"
-        root = Path(workspace_root or ".").resolve()
-        workspace_files = sorted(str(f.relative_to(root)) for f in root.rglob("*") if f.is_file())
-        files_hint = ", ".join(workspace_files[:20]) if workspace_files else "none"
-        system = (
-            "You are a coding agent that MUST use tools to complete tasks. NEVER respond with only text—ALWAYS call a tool.\n\n"
-            "CRITICAL: When the user asks you to create, edit, or modify anything, you MUST call the appropriate tool. "
-            "Do NOT describe what you would do—actually DO it by calling tools.\n\n"
-            "Available tools:\n"
-            "- write_file: Create new files or overwrite existing ones. Use this for creating new files.\n"
-            "- read_file: Read file contents before editing.\n"
-            "- search_replace: Edit existing files by replacing text.\n"
-            "- grep_tool: Search for text in files.\n"
-            "- run_shell_tool: Run shell commands (e.g., pytest).\n\n"
-            "Files in workspace: " + files_hint + "\n\n"
-            "To create a new file: Call write_file with file_path and content.\n"
-            "To edit a file: Call read_file first, then call search_replace.\n\n"
-            "IMPORTANT: You must call at least one tool. Text-only responses are not allowed."
-        )
+        if model_tier not in bound:
+            base = _get_llm(model_tier)
+            bound[model_tier] = (base, base.bind_tools(tools))
+        base_llm, llm = bound[model_tier]
         messages = list(state.get("messages") or [])
         if not messages:
             messages = [HumanMessage(content=state.get("user_request") or "")]
-        
+
         # If this is a retry (loop > 0) and no edits were made, add feedback
         loop_count = state.get("loop_count") or 0
         edit_attempts = state.get("edit_attempts") or 0
-        retry_hint = ""
-        if loop_count > 0 and edit_attempts == 0:
-            retry_hint = (
-                "\n\n**RETRY NOTICE**: Your previous response did not call any tools. "
-                "You MUST call a tool now to complete the task. Call write_file to create a file, "
-                "or read_file followed by search_replace to edit an existing file."
-            )
-        
-        msgs = [
-            SystemMessage(content=f"{system}{retry_hint}\n\nContext:\n{context_blob}"),
-            *messages,
-        ]
+        msgs = assemble_prompt(
+            messages,
+            build_repo_map(workspace_root),
+            state.get("context_snippets") or [],
+            retry=loop_count > 0 and edit_attempts == 0,
+            cache_markers=supports_cache_markers(base_llm),
+            verification=state.get("verification_result"),
+            hint=state.get("progress_hint"),
+        )
         start = time.perf_counter()
         out = llm.invoke(msgs)
         model_ms = int((time.perf_counter() - start) * 1000)
         lb = dict(state.get("latency_breakdown") or {})
         lb["model_ms"] = lb.get("model_ms", 0) + model_ms
+        record_metric(state, "model_ms", model_ms)
+        usage = extract_token_usage(out)
         update = {
             "messages": [out],
             "current_phase": "act" if getattr(out, "tool_calls", None) else "observe",
             "latency_breakdown": lb,
+            "token_usage": accumulate_token_usage(state.get("token_usage"), usage),
         }
-        update.update(append_trajectory("plan", "llm_call", f"model_tier={model_tier}"))
+        detail = f"model_tier={model_tier} in={usage['input_tokens']} cached={usage['cache_read_tokens']}"
+        update.update(append_trajectory(state, "plan", "llm_call", detail))
         return update
 
     return plan_node
 
 
 def build_verify_node(workspace_root: str):
-    """Build verify node: run test command in sandbox."""
+    """Build verify node: run test command in sandbox and distill its output."""
 
     def verify_node(state: AgentState) -> dict:
         log_state_transition("verify", state)
         root = workspace_root or "."
-        result = run_command(VERIFY_COMMAND, cwd=root)
+        junit_xml = new_log_path(root, ".xml")
+        # With staged edits pending, tests run in a shadow copy that includes them
+        exec_root = execution_dir(root)
+        result = run_command(VERIFY_COMMAND.format(junit_xml=shlex.quote(str(junit_xml))), cwd=exec_root)
         lb = dict(state.get("latency_breakdown") or {})
         lb["sandbox_ms"] = lb.get("sandbox_ms", 0) + result.get("duration_ms", 0)
+        record_metric(state, "sandbox_ms", result.get("duration_ms", 0))
+        output = result.get("output", "")
+        digest = distill(output, str(exec_root), junit_xml)
+        junit_xml.unlink(missing_ok=True)
+        log_id = save_log(root, output)
+        # The command swallows pytest's exit code, so failures come from the parsed report
+        passed = result["passed"] and not digest["failures"]
         update = {
-            "verification_result": {"passed": result["passed"], "output": result.get("output", "")},
+            "verification_result": {
+                "passed": passed,
+                "output": format_digest(digest, log_id),
+                "failures": [f["id"] for f in digest["failures"]],
+                "log_id": log_id,
+            },
             "latency_breakdown": lb,
             "current_phase": "observe",
         }
-        update.update(append_trajectory("verify", "run_tests", str(result.get("passed"))))
+        update.update(append_trajectory(state, "verify", "run_tests", str(passed)))
         return update
 
     return verify_node
 
 
-def build_observe_node():
-    """Build observe node: decide continue or END."""
+def build_observe_node(workspace_root: str):
+    """Build observe node: decide continue or END, cutting loops that stop making progress."""
 
     def observe_node(state: AgentState) -> dict:
         log_state_transition("observe", state)
@@ -129,15 +143,34 @@ def build_observe_node():
         # (LLM may have responded with text instead of tool calls)
         no_action_taken = edit_attempts == 0 and loop_count == 1
         should_continue = no_action_taken or (not passed and loop_count < MAX_LOOPS)
+
+        progress, stall = check_progress(
+            state.get("progress"), state.get("messages") or [], verification, workspace_root
+        )
+        update = {"progress_hint": ""}
+        if stall and should_continue and not no_action_taken:
+            strikes = progress["strikes"]
+            update["progress_hint"] = HINTS[stall]
+            if strikes >= ESCALATE_STRIKES and (state.get("model_tier") or "fast") == "fast":
+                update["model_tier"] = "high"
+            elif strikes >= STOP_STRIKES:
+                calls = (state.get("token_usage") or {}).get("calls", 0)
+                per_loop = max(1.0, calls / loop_count)
+                progress["stopped"] = stall
+                progress["saved_calls"] = round((MAX_LOOPS - loop_count) * per_loop)
+                should_continue = False
         
-        update = {
+        update.update({
             "loop_count": loop_count,
             "current_phase": "plan" if should_continue else "done",
-        }
+            "progress": progress,
+        })
         detail = f"passed={passed} loop={loop_count} edits={edit_attempts}"
         if no_action_taken:
             detail += " (retrying: no action taken)"
-        update.update(append_trajectory("observe", "decision", detail))
+        if stall:
+            detail += f" stall={stall} x{progress['strikes']}"
+        update.update(append_trajectory(state, "observe", "decision", detail))
         return update
 
     return observe_node
@@ -145,11 +178,18 @@ def build_observe_node():
 
 def build_tools_node(workspace_root: str):
     """Build a tools node that logs and updates edit_attempts/edit_applied from tool results."""
-    tool_node = get_tool_node(workspace_root)
+    cache = ToolResultCache(workspace_root)
+    timings: list[tuple[str, float]] = []
+    tool_node = get_tool_node(workspace_root, cache, timings)
 
     def tools_node(state: AgentState) -> dict:
         log_state_transition("tools", state)
+        cache.begin_turn(state.get("trajectory_handle"))
+        hits_before = cache.hits
         result = tool_node.invoke(state)
+        for name, ms in timings:
+            record_metric(state, f"tool:{name}", ms)
+        timings.clear()
         attempts = state.get("edit_attempts") or 0
         applied = state.get("edit_applied") or 0
         for msg in result.get("messages") or []:
@@ -162,6 +202,8 @@ def build_tools_node(workspace_root: str):
                     attempts += 1
         result["edit_attempts"] = attempts
         result["edit_applied"] = applied
+        if cache.hits > hits_before:
+            result["tool_cache_hits"] = (state.get("tool_cache_hits") or 0) + cache.hits - hits_before
         return result
 
     return tools_node
@@ -187,15 +229,28 @@ def route_after_observe(state: AgentState) -> Literal["plan", "__end__"]:
     return "__end__"
 
 
+def _timed(name: str, node):
+    """Wrap a node so each execution records a node:<name> latency sample."""
+
+    def timed_node(state: AgentState) -> dict:
+        start = time.perf_counter()
+        update = node(state)
+        # The entry node may have just created the run's store
+        record_metric({**state, **update}, f"node:{name}", (time.perf_counter() - start) * 1000)
+        return update
+
+    return timed_node
+
+
 def build_graph(workspace_root: str):
     """Build the StateGraph with all nodes and edges."""
     builder = StateGraph(AgentState)
-    builder.add_node("router", router_node)
-    builder.add_node("context_engine", context_engine_node)
-    builder.add_node("plan", build_plan_node(workspace_root))
-    builder.add_node("tools", build_tools_node(workspace_root))
-    builder.add_node("verify", build_verify_node(workspace_root))
-    builder.add_node("observe", build_observe_node())
+    builder.add_node("router", _timed("router", router_node))
+    builder.add_node("context_engine", _timed("context_engine", context_engine_node))
+    builder.add_node("plan", _timed("plan", build_plan_node(workspace_root)))
+    builder.add_node("tools", _timed("tools", build_tools_node(workspace_root)))
+    builder.add_node("verify", _timed("verify", build_verify_node(workspace_root)))
+    builder.add_node("observe", _timed("observe", build_observe_node(workspace_root)))
 
     builder.add_edge(START, "router")
     builder.add_edge("router", "context_engine")
@@ -206,3 +261,14 @@ def build_graph(workspace_root: str):
     builder.add_conditional_edges("observe", route_after_observe, {"plan": "plan", "__end__": END})
 
     return builder.compile()
+
+
+_graphs: dict[str, object] = {}
+
+
+def get_graph(workspace_root: str):
+    """Return the compiled graph for a workspace, building it once per process."""
+    key = str(workspace_root)
+    if key not in _graphs:
+        _graphs[key] = build_graph(key)
+    return _graphs[key]
@@ -0,0 +1,220 @@
+"""Workspace overlay: staged file contents layered over the real workspace.
+
+Staged writes are kept in memory until reviewed. Reads go through the overlay, and a
+shadow copy of the workspace with staged files applied is materialized on demand so
+that shell commands and test runs see the pending changes; files a command writes
+there are absorbed back as staged changes. Commit is all-or-nothing.
+"""
+
+import os
+import shutil
+import threading
+from pathlib import Path
+
+from src.cache_dir import workspace_cache_dir
+from src.workspace_files import SKIP_DIRS
+
+
+class StagedChange:
+    """Pending content for one file, plus the on-disk content it was based on (None = new file)."""
+
+    __slots__ = ("path", "base", "content")
+
+    def __init__(self, path: Path, base: str | None, content: str):
+        self.path = path
+        self.base = base
+        self.content = content
+
+
+class WorkspaceOverlay:
+    """Pending changes for one workspace, keyed by absolute path."""
+
+    def __init__(self, workspace_root: str):
+        self.root = Path(workspace_root or ".").resolve()
+        self.changes: dict[str, StagedChange] = {}
+        self.version = 0
+        # Shadow state as of the last materialize(): relative path -> (size, mtime_ns, staged content
+        # written there, or None for a copy of the on-disk file). absorb() diffs against this.
+        self._shadow: dict[Path, tuple[int, int, str | None]] = {}
+        # Tool calls from one message run in threads; stage/materialize/absorb must not interleave.
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.changes)
+
+    def get(self, path: Path) -> str | None:
+        """Return staged content for path, or None if nothing is staged for it."""
+        change = self.changes.get(str(path))
+        return change.content if change else None
+
+    def staged_paths(self) -> list[Path]:
+        return [c.path for c in self.changes.values()]
+
+    def stage(self, path: Path, content: str) -> StagedChange:
+        """Stage new content for path; the first staging records the on-disk base."""
+        key = str(path)
+        with self._lock:
+            change = self.changes.get(key)
+            if change is None:
+                base = path.read_text(encoding="utf-8", errors="replace") if path.is_file() else None
+                change = self.changes[key] = StagedChange(path, base, content)
+            else:
+                change.content = content
+            self.version += 1
+            return change
+
+    def discard(self, paths: list[Path] | None = None) -> int:
+        """Drop staged changes (all, or only paths). Returns how many were dropped."""
+        with self._lock:
+            keys = [str(p) for p in paths] if paths is not None else list(self.changes)
+            dropped = sum(1 for k in keys if self.changes.pop(k, None) is not None)
+            if dropped:
+                self.version += 1
+            return dropped
+
+    def conflicts(self) -> list[Path]:
+        """Return staged paths whose on-disk content changed since they were staged."""
+        out = []
+        for change in self.changes.values():
+            current = change.path.read_text(encoding="utf-8", errors="replace") if change.path.is_file() else None
+            if current != change.base:
+                out.append(change.path)
+        return out
+
+    def commit(self) -> list[Path]:
+        """Write every staged change to the workspace atomically; returns the paths written.
+
+        New contents are first written to temp files next to their targets, then swapped in
+        with os.replace. If anything fails, already-replaced files are restored from their base
+        and nothing is left half-applied. Raises RuntimeError on conflicts or write errors.
+        """
+        with self._lock:
+            conflicts = self.conflicts()
+            if conflicts:
+                raise RuntimeError("changed on disk since staging: " + ", ".join(str(p) for p in conflicts))
+            changes = list(self.changes.values())
+            temps: list[tuple[Path, StagedChange]] = []
+            try:
+                for change in changes:
+                    change.path.parent.mkdir(parents=True, exist_ok=True)
+                    tmp = change.path.with_name(f".{change.path.name}.staged-{os.getpid()}")
+                    tmp.write_text(change.content, encoding="utf-8")
+                    temps.append((tmp, change))
+            except OSError as e:
+                for tmp, _ in temps:
+                    tmp.unlink(missing_ok=True)
+                raise RuntimeError(f"could not stage write: {e}") from e
+            replaced: list[StagedChange] = []
+            try:
+                for tmp, change in temps:
+                    os.replace(tmp, change.path)
+                    replaced.append(change)
+            except OSError as e:
+                for change in replaced:
+                    if change.base is None:
+                        change.path.unlink(missing_ok=True)
+                    else:
+                        change.path.write_text(change.base, encoding="utf-8")
+                for tmp, _ in temps:
+                    tmp.unlink(missing_ok=True)
+                raise RuntimeError(f"commit failed and was rolled back: {e}") from e
+            self.changes.clear()
+            self.version += 1
+            return [c.path for c in changes]
+
+    def materialize(self) -> Path:
+        """Sync a shadow copy of the workspace with staged files applied; return its root.
+
+        Only files whose size/mtime differ are copied, so repeated calls are incremental. The
+        size, mtime and staged content of every shadow file are recorded for absorb().
+        """
+        shadow = workspace_cache_dir(str(self.root), "overlay") / "tree"
+        with self._lock:
+            record: dict[Path, tuple[int, int, str | None]] = {}
+            for dirpath, dirnames, filenames in os.walk(self.root):
+                dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+                rel_dir = Path(dirpath).relative_to(self.root)
+                for name in filenames:
+                    src = Path(dirpath) / name
+                    rel = rel_dir / name
+                    dst = shadow / rel
+                    if str(src.resolve()) in self.changes:
+                        continue
+                    try:
+                        s_st = src.stat()
+                        d_st = dst.stat() if dst.exists() else None
+                        if d_st is None or d_st.st_size != s_st.st_size or d_st.st_mtime_ns != s_st.st_mtime_ns:
+                            dst.parent.mkdir(parents=True, exist_ok=True)
+                            shutil.copy2(src, dst)
+                    except OSError:
+                        continue
+                    record[rel] = (s_st.st_size, s_st.st_mtime_ns, None)
+            for change in self.changes.values():
+                rel = change.path.relative_to(self.root)
+                dst = shadow / rel
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                dst.write_text(change.content, encoding="utf-8")
+                d_st = dst.stat()
+                record[rel] = (d_st.st_size, d_st.st_mtime_ns, change.content)
+            for dirpath, dirnames, filenames in os.walk(shadow):
+                dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+                for name in filenames:
+                    path = Path(dirpath) / name
+                    if path.relative_to(shadow) not in record:
+                        path.unlink(missing_ok=True)
+            self._shadow = record
+        return shadow
+
+    def absorb(self, shadow: Path) -> tuple[list[Path], list[Path]]:
+        """Stage the files a command created or modified in the shadow copy.
+
+        Call right after a command ran in the tree returned by materialize(), before the next
+        materialize() (which would otherwise reset those files). A file counts as modified only
+        if it differs from what materialize() put there, so edits staged or written while the
+        command ran are never overwritten with the older shadow content. Returns (staged paths,
+        paths that could not be carried over: deleted files, files that are not UTF-8 text, and
+        files the command changed that were also changed in the workspace meanwhile).
+        """
+        staged: list[Path] = []
+        skipped: list[Path] = []
+        with self._lock:
+            for dirpath, dirnames, filenames in os.walk(shadow):
+                dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+                for name in filenames:
+                    copy = Path(dirpath) / name
+                    rel = copy.relative_to(shadow)
+                    path = self.root / rel
+                    before = self._shadow.get(rel)
+                    try:
+                        c_st = copy.stat()
+                    except OSError:
+                        continue
+                    if before is not None and before[:2] == (c_st.st_size, c_st.st_mtime_ns):
+                        continue
+                    change = self.changes.get(str(path))
+                    if before is None:
+                        moved_on = change is not None or path.exists()
+                    elif before[2] is None:
+                        try:
+                            s_st = path.stat()
+                        except OSError:
+                            s_st = None
+                        moved_on = change is not None or s_st is None or before[:2] != (s_st.st_size, s_st.st_mtime_ns)
+                    else:
+                        moved_on = change is None or change.content != before[2]
+                    if moved_on:
+                        skipped.append(path)
+                        continue
+                    try:
+                        content = copy.read_text(encoding="utf-8")
+                    except (OSError, UnicodeDecodeError):
+                        skipped.append(path)
+                        continue
+                    current = change.content if change else (
+                        path.read_text(encoding="utf-8", errors="replace") if path.is_file() else None
+                    )
+                    if content != current:
+                        self.stage(path, content)
+                        staged.append(path)
+            skipped.extend(self.root / rel for rel in self._shadow if not (shadow / rel).exists())
+        return staged, sorted(set(skipped))
@@ -0,0 +1,126 @@
+"""Progress detection for the observe loop: spot stalls and edit oscillation early.
+
+Each loop is fingerprinted by the tool calls it made, the content hashes of every file
+touched so far, and the set of failing tests. When loops stop changing anything (or flip
+files back to an earlier state), observe_node hints, escalates the model tier, then stops.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+from src.approvals import read_staged
+
+WRITE_TOOLS = ("search_replace_tool", "write_file_tool")
+ESCALATE_STRIKES = 2
+STOP_STRIKES = 3
+
+HINTS = {
+    "repeated_failed_edit": (
+        "Your search_replace old_string did not match again. Call read_file on the file first and copy "
+        "the exact text (including indentation) before retrying, or use write_file for a full rewrite."
+    ),
+    "oscillation": (
+        "Your edits reverted the files to an earlier state that already failed. Do not undo the previous "
+        "change; re-read the failing test output (read_log_tool) and try a different fix."
+    ),
+    "no_progress": (
+        "The last loop changed nothing: same tool calls, same files, same failing tests. "
+        "Take a different approach: inspect the failing test and the code it exercises before editing."
+    ),
+    "same_failure": (
+        "The files and the failing tests are identical to the previous loop. Your changes have no effect on "
+        "the failure; look at the failing assertion and the frames in the verification digest."
+    ),
+}
+
+
+def _digest(obj) -> str:
+    return hashlib.sha1(json.dumps(obj, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def _file_hash(workspace_root: str, path: Path) -> str:
+    """Hash the file as the agent sees it (staged content first, then disk)."""
+    staged = read_staged(workspace_root, path.resolve())
+    if staged is not None:
+        return hashlib.sha1(staged.encode("utf-8")).hexdigest()[:16]
+    try:
+        return hashlib.sha1(path.read_bytes()).hexdigest()[:16]
+    except OSError:
+        return "missing"
+
+
+def _loop_calls(messages: list) -> tuple[list[str], list[str], list[str]]:
+    """Return (call signatures, touched file paths, failed search_replace signatures) for messages."""
+    results = {m.tool_call_id: m.content for m in messages if isinstance(m, ToolMessage)}
+    calls: list[str] = []
+    touched: list[str] = []
+    failed_edits: list[str] = []
+    for msg in messages:
+        if not isinstance(msg, AIMessage):
+            continue
+        for call in msg.tool_calls or []:
+            sig = f"{call['name']}:{_digest(call.get('args') or {})}"
+            calls.append(sig)
+            if call["name"] in WRITE_TOOLS:
+                path = (call.get("args") or {}).get("file_path")
+                if path:
+                    touched.append(path)
+                content = results.get(call.get("id"))
+                if isinstance(content, str) and content.startswith("attempted:"):
+                    failed_edits.append(sig)
+    return calls, touched, failed_edits
+
+
+def check_progress(
+    progress: dict | None,
+    messages: list,
+    verification: dict,
+    workspace_root: str,
+) -> tuple[dict, str | None]:
+    """Fingerprint the loop that just finished and compare it with earlier loops.
+
+    Returns (new progress dict, stall reason or None). The progress dict carries the message
+    index where the next loop starts, fingerprint history, touched files, failed edit
+    signatures and the count of consecutive stalled loops ("strikes").
+    """
+    prev = dict(progress or {})
+    start = prev.get("msg_index", 0)
+    calls, touched, failed_edits = _loop_calls(messages[start:])
+    all_touched = sorted(set(prev.get("touched", [])) | set(touched))
+    root = Path(workspace_root or ".").resolve()
+    fingerprint = {
+        "calls": _digest(sorted(calls)),
+        "files": _digest({p: _file_hash(workspace_root, root / p) for p in all_touched}),
+        "failures": _digest(sorted(verification.get("failures") or [])),
+    }
+    history = list(prev.get("history", []))
+    earlier_failed = set(prev.get("failed_edits", []))
+    failing = bool(verification.get("failures")) or not verification.get("passed", False)
+
+    reason = None
+    if failing and history:
+        last = history[-1]
+        if any(sig in earlier_failed for sig in failed_edits):
+            reason = "repeated_failed_edit"
+        elif fingerprint == last:
+            reason = "no_progress"
+        elif all_touched and fingerprint["files"] != last["files"] and any(
+            h["files"] == fingerprint["files"] for h in history[:-1]
+        ):
+            reason = "oscillation"
+        elif all_touched and fingerprint["files"] == last["files"] and fingerprint["failures"] == last["failures"]:
+            reason = "same_failure"
+
+    history.append(fingerprint)
+    updated = {
+        **prev,
+        "msg_index": len(messages),
+        "history": history[-10:],
+        "touched": all_touched,
+        "failed_edits": sorted(earlier_failed | set(failed_edits)),
+        "strikes": prev.get("strikes", 0) + 1 if reason else 0,
+    }
+    return updated, reason
@@ -0,0 +1,134 @@
+"""Prompt assembly: order plan prompts from most to least stable for provider prefix caching."""
+
+from pathlib import Path
+from typing import Any
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from src.approvals import get_overlay
+from src.symbol_index import get_symbol_index
+from src.workspace_files import walk_files
+
+# Static instructions never change within a run (or across runs), so they lead the prompt.
+# Tool schemas are sent by bind_tools ahead of the messages and are equally stable.
+STATIC_INSTRUCTIONS = (
+    "You are a coding agent that MUST use tools to complete tasks. NEVER respond with only text—ALWAYS call a tool.\n\n"
+    "CRITICAL: When the user asks you to create, edit, or modify anything, you MUST call the appropriate tool. "
+    "Do NOT describe what you would do—actually DO it by calling tools.\n\n"
+    "Available tools:\n"
+    "- write_file: Create new files or overwrite existing ones. Use this for creating new files.\n"
+    "- read_file: Read file contents before editing.\n"
+    "- search_replace: Edit existing files by replacing text.\n"
+    "- grep_tool: Search for text in files.\n"
+    "- run_shell_tool: Run shell commands (e.g., pytest).\n"
+    "- find_symbol_tool: Locate a Python class/function definition (file and line span).\n"
+    "- find_references_tool: List imports and call sites of a Python name.\n"
+    "- read_log_tool: Page through a full test/shell log referenced by a digest.\n\n"
+    "To create a new file: Call write_file with file_path and content.\n"
+    "To edit a file: Call read_file first, then call search_replace.\n"
+    "To locate code: Use the repo map and find_symbol_tool, then read_file with start_line/end_line.\n\n"
+    "IMPORTANT: You must call at least one tool. Text-only responses are not allowed."
+)
+
+RETRY_NOTICE = (
+    "**RETRY NOTICE**: Your previous response did not call any tools. "
+    "You MUST call a tool now to complete the task. Call write_file to create a file, "
+    "or read_file followed by search_replace to edit an existing file."
+)
+
+MAX_OTHER_FILES = 20
+MAX_CONTEXT_SNIPPETS = 10
+
+# Providers that accept explicit cache breakpoints on content blocks. Gemini 2.5 and OpenAI
+# cache shared prefixes implicitly, so for them the stable ordering alone is what matters.
+CACHE_MARKER_LLM_TYPES = ("anthropic-chat",)
+
+
+def build_repo_map(workspace_root: str) -> str:
+    """Return the compact repo map: Python outline from the symbol index plus other file names.
+
+    Deterministic, and it only changes when definitions or files change, so it stays cacheable.
+    """
+    root = Path(workspace_root or ".").resolve()
+    index = get_symbol_index(str(root))
+    outline = index.repo_map()
+    files = set(walk_files(root))
+    overlay = get_overlay(str(root))
+    if overlay:
+        # Files created by staged edits exist only in the overlay until review
+        files.update(overlay.staged_paths())
+    others = sorted(str(f.relative_to(root)) for f in files if f.suffix != ".py")
+    parts = ["Repo map (file: symbols):", outline or "(no Python files)"]
+    if others:
+        listed = ", ".join(others[:MAX_OTHER_FILES])
+        if len(others) > MAX_OTHER_FILES:
+            listed += f", ... ({len(others) - MAX_OTHER_FILES} more)"
+        parts.append("Other files: " + listed)
+    return "\n".join(parts)
+
+
+def supports_cache_markers(llm: Any) -> bool:
+    """Return True if the (unbound) chat model accepts explicit cache_control markers."""
+    return getattr(llm, "_llm_type", "") in CACHE_MARKER_LLM_TYPES
+
+
+def assemble_prompt(
+    messages: list,
+    repo_map: str,
+    context_snippets: list[str] | None = None,
+    retry: bool = False,
+    cache_markers: bool = False,
+    verification: dict | None = None,
+    hint: str | None = None,
+) -> list:
+    """Build the plan prompt in stability order.
+
+    Layout (most stable first):
+        1. System: static instructions, then the repo map
+        2. Conversation history (append-only, so earlier turns stay a shared prefix)
+        3. Trailing volatile turn: retrieved context, last failed verification digest,
+           progress hint, retry notice
+
+    With cache_markers, the system blocks carry an ephemeral cache breakpoint.
+    """
+    snippets = context_snippets or []
+    context_blob = "\n\n".join(snippets[:MAX_CONTEXT_SNIPPETS]) if snippets else "(no context)"
+    volatile = f"Context:\n{context_blob}"
+    if verification and not verification.get("passed", True):
+        volatile = f"Last verification failed:\n{verification.get('output', '')}\n\n{volatile}"
+    if hint:
+        volatile = f"**PROGRESS CHECK**: {hint}\n\n{volatile}"
+    if retry:
+        volatile = f"{RETRY_NOTICE}\n\n{volatile}"
+    if cache_markers:
+        system = SystemMessage(content=[
+            {"type": "text", "text": STATIC_INSTRUCTIONS, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": repo_map, "cache_control": {"type": "ephemeral"}},
+        ])
+    else:
+        system = SystemMessage(content=f"{STATIC_INSTRUCTIONS}\n\n{repo_map}")
+    return [
+        system,
+        *messages,
+        HumanMessage(content=volatile),
+    ]
+
+
+def extract_token_usage(message: Any) -> dict[str, int]:
+    """Return {input_tokens, output_tokens, cache_read_tokens} from an AIMessage's usage_metadata."""
+    usage = getattr(message, "usage_metadata", None) or {}
+    details = usage.get("input_token_details") or {}
+    return {
+        "input_tokens": int(usage.get("input_tokens") or 0),
+        "output_tokens": int(usage.get("output_tokens") or 0),
+        "cache_read_tokens": int(details.get("cache_read") or 0),
+    }
+
+
+def accumulate_token_usage(totals: dict | None, usage: dict[str, int]) -> dict[str, int]:
+    """Return a new token_usage dict with usage added to totals and the call counter bumped."""
+    out = dict(totals or {})
+    for k, v in usage.items():
+        out[k] = out.get(k, 0) + v
+    out["calls"] = out.get("calls", 0) + 1
+    return out
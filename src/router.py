@@ -1,5 +1,6 @@
 """Router node: mock model selection (high-reasoning vs fast)."""
 
+from src.logging_.trajectory import ensure_store
 from src.state import AgentState
 
 
@@ -12,5 +13,7 @@ def router_node(state: AgentState) -> dict:
         model_tier = "fast"
     return {
         "model_tier": model_tier,
+        "initial_model_tier": model_tier,
         "current_phase": "retrieve",
+        **ensure_store(state),
     }
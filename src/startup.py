@@ -0,0 +1,42 @@
+"""Startup profiling: time CLI import/compile stages against a budget.
+
+Deliberately stdlib-only so that measuring startup does not itself pull in heavy modules.
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+STARTUP_BUDGET_MS = 1500
+
+
+class StartupProfile:
+    """Collect (stage, ms, new modules) timings in order."""
+
+    def __init__(self) -> None:
+        self.stages: list[tuple[str, float, int]] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        modules_before = len(sys.modules)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.stages.append((name, elapsed, len(sys.modules) - modules_before))
+
+    @property
+    def total_ms(self) -> float:
+        return sum(ms for _, ms, _ in self.stages)
+
+    def report(self, budget_ms: float = STARTUP_BUDGET_MS) -> str:
+        """Return a plain-text timing table; flags the total if it exceeds the budget."""
+        lines = [f"{'stage':<24}{'ms':>10}{'modules':>10}"]
+        for name, ms, modules in self.stages:
+            lines.append(f"{name:<24}{ms:>10.1f}{modules:>10}")
+        status = "OVER BUDGET" if self.total_ms > budget_ms else "within budget"
+        lines.append(f"{'total':<24}{self.total_ms:>10.1f}   ({status}: {budget_ms:.0f}ms)")
+        lines.append("For per-module detail: python -X importtime main.py --profile-startup")
+        return "\n".join(lines)
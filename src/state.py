@@ -1,10 +1,16 @@
 """Graph state schema and reducers for the agentic loop."""
 
-from operator import add
 from typing import Annotated, Literal, TypedDict
 
 from langgraph.graph.message import add_messages
 
+TRAJECTORY_WINDOW = 20
+
+
+def recent_window(left: list | None, right: list | None) -> list:
+    """Reducer: append entries but keep only the last TRAJECTORY_WINDOW (full trace is in the store)."""
+    return ((left or []) + (right or []))[-TRAJECTORY_WINDOW:]
+
 
 class AgentState(TypedDict, total=False):
     """State for the Plan → Act → Observe graph."""
@@ -14,10 +20,17 @@ class AgentState(TypedDict, total=False):
     workspace_path: str
     loop_count: int
     model_tier: Literal["high", "fast"]
+    initial_model_tier: Literal["high", "fast"]
     current_phase: Literal["plan", "retrieve", "act", "verify", "observe", "done"]
     context_snippets: list[str]
     verification_result: dict
-    trajectory: Annotated[list[dict], add]
+    trajectory: Annotated[list[dict], recent_window]
+    trajectory_handle: str
     edit_attempts: int
     edit_applied: int
     latency_breakdown: dict
+    token_usage: dict
+    tool_cache_hits: int
+    progress: dict
+    progress_hint: str
+    staged_changes: dict
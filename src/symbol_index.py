@@ -0,0 +1,279 @@
+"""Repository symbol map: ast-derived definitions, imports and references per Python file.
+
+Parsed results are cached per content hash (one JSON blob per hash) with a manifest of
+path -> (mtime, size, hash), so only changed files are re-parsed. Staged overlay content
+(see src/approvals.py) shadows the on-disk file, so lookups and line spans match what
+read_file_tool returns. Lookups by name go through in-memory dicts and are O(1).
+"""
+
+import ast
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from src.workspace_files import walk_files
+
+MAX_REPO_MAP_CHARS = 2500
+MAX_LOCATIONS = 50
+
+
+class _SymbolVisitor(ast.NodeVisitor):
+    """Collect definitions (with qualified names), imports and references in one pass."""
+
+    def __init__(self) -> None:
+        self.scope: list[tuple[str, str]] = []
+        self.defs: list[list] = []
+        self.imports: list[list] = []
+        self.refs: list[list] = []
+
+    def _define(self, node: ast.AST, kind: str, sig: str) -> None:
+        qual = ".".join([*(name for name, _ in self.scope), node.name])
+        self.defs.append([node.name, qual, kind, node.lineno, node.end_lineno or node.lineno, sig])
+        self.scope.append((node.name, kind))
+        self.generic_visit(node)
+        self.scope.pop()
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        bases = ", ".join(ast.unparse(b) for b in node.bases)
+        self._define(node, "class", f"class {node.name}({bases})" if bases else f"class {node.name}")
+
+    def visit_FunctionDef(self, node: ast.FunctionDef | ast.AsyncFunctionDef) -> None:
+        kind = "method" if self.scope and self.scope[-1][1] == "class" else "function"
+        self._define(node, kind, f"def {node.name}({ast.unparse(node.args)})")
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            self.imports.append([alias.asname or alias.name, alias.name, node.lineno])
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        for alias in node.names:
+            self.imports.append([alias.asname or alias.name, f"{node.module or ''}.{alias.name}", node.lineno])
+
+    def visit_Call(self, node: ast.Call) -> None:
+        func = node.func
+        if isinstance(func, ast.Name):
+            self.refs.append([func.id, "call", node.lineno])
+        elif isinstance(func, ast.Attribute):
+            self.refs.append([func.attr, "call", node.lineno])
+            self.visit(func.value)
+        else:
+            self.visit(func)
+        for arg in node.args:
+            self.visit(arg)
+        for kw in node.keywords:
+            self.visit(kw)
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if isinstance(node.ctx, ast.Load):
+            self.refs.append([node.id, "name", node.lineno])
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:
+        self.refs.append([node.attr, "attr", node.lineno])
+        self.generic_visit(node)
+
+
+def parse_symbols(source: str) -> dict:
+    """Return {"defs": [...], "imports": [...], "refs": [...]} for Python source.
+
+    defs:    [name, qualname, kind, start_line, end_line, signature]
+    imports: [name, module, line]
+    refs:    [name, kind ("call" | "name" | "attr"), line]
+    """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return {"defs": [], "imports": [], "refs": [], "error": "syntax error"}
+    visitor = _SymbolVisitor()
+    visitor.visit(tree)
+    return {"defs": visitor.defs, "imports": visitor.imports, "refs": visitor.refs}
+
+
+class SymbolIndex:
+    """Incrementally maintained symbol table for the Python files of one workspace."""
+
+    def __init__(self, workspace_root: str, cache_dir: Path | None = None):
+        self.root = Path(workspace_root or ".").resolve()
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.files: dict[str, dict] = {}
+        self._symbols: dict[str, dict] = {}
+        self._staged: dict[str, dict] = {}
+        self._staged_hashes: dict[str, str] = {}
+        self.defs_by_name: dict[str, list[tuple]] = {}
+        self.refs_by_name: dict[str, list[tuple]] = {}
+        if self.cache_dir:
+            (self.cache_dir / "blobs").mkdir(parents=True, exist_ok=True)
+            manifest = self.cache_dir / "manifest.json"
+            try:
+                self.files = json.loads(manifest.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self.files = {}
+
+    def _load_blob(self, digest: str) -> dict | None:
+        if not self.cache_dir:
+            return None
+        try:
+            return json.loads((self.cache_dir / "blobs" / f"{digest}.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def _store_blob(self, digest: str, symbols: dict) -> None:
+        if self.cache_dir:
+            (self.cache_dir / "blobs" / f"{digest}.json").write_text(json.dumps(symbols), encoding="utf-8")
+
+    def _parse(self, source: str) -> tuple[str, dict, bool]:
+        """Return (content hash, symbols, whether it had to be parsed) using the blob cache."""
+        digest = hashlib.sha1(source.encode("utf-8")).hexdigest()
+        symbols = self._load_blob(digest)
+        if symbols is not None:
+            return digest, symbols, False
+        symbols = parse_symbols(source)
+        self._store_blob(digest, symbols)
+        return digest, symbols, True
+
+    def update(self, staged: dict[str, str] | None = None) -> int:
+        """Re-parse changed Python files, drop deleted ones and rebuild lookups. Returns files re-parsed.
+
+        staged maps workspace-relative paths to staged content; those files are indexed from
+        that content instead of disk (the manifest keeps tracking disk only).
+        """
+        seen: set[str] = set()
+        changed = 0
+        dirty = False
+        for f in walk_files(self.root, ".py"):
+            rel = str(f.relative_to(self.root))
+            seen.add(rel)
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            entry = self.files.get(rel)
+            if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+                if rel not in self._symbols:
+                    symbols = self._load_blob(entry["sha1"])
+                    if symbols is not None:
+                        self._symbols[rel] = symbols
+                        dirty = True
+                        continue
+                else:
+                    continue
+            try:
+                source = f.read_text(encoding="utf-8", errors="replace")
+            except Exception:
+                continue
+            digest, symbols, parsed = self._parse(source)
+            changed += parsed
+            self.files[rel] = {"sha1": digest, "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+            self._symbols[rel] = symbols
+            dirty = True
+        for rel in [r for r in self.files if r not in seen]:
+            self.files.pop(rel, None)
+            self._symbols.pop(rel, None)
+            dirty = True
+        if dirty:
+            self._save()
+        staged = {rel: text for rel, text in (staged or {}).items() if rel.endswith(".py")}
+        hashes = {rel: hashlib.sha1(text.encode("utf-8")).hexdigest() for rel, text in staged.items()}
+        if hashes != self._staged_hashes:
+            self._staged = {}
+            for rel, text in staged.items():
+                _, symbols, parsed = self._parse(text)
+                self._staged[rel] = symbols
+                changed += parsed
+            self._staged_hashes = hashes
+            dirty = True
+        if dirty or not self.defs_by_name:
+            self._rebuild_lookups()
+        return changed
+
+    def _view(self) -> dict[str, dict]:
+        """Symbols per file as the agent sees them: staged content over disk."""
+        return {**self._symbols, **self._staged} if self._staged else self._symbols
+
+    def _save(self) -> None:
+        if not self.cache_dir:
+            return
+        manifest = self.cache_dir / "manifest.json"
+        tmp = manifest.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.files), encoding="utf-8")
+        os.replace(tmp, manifest)
+
+    def _rebuild_lookups(self) -> None:
+        defs: dict[str, list[tuple]] = {}
+        refs: dict[str, list[tuple]] = {}
+        view = self._view()
+        for rel in sorted(view):
+            symbols = view[rel]
+            for name, qual, kind, start, end, sig in symbols["defs"]:
+                loc = (rel, start, end, kind, qual, sig)
+                defs.setdefault(name, []).append(loc)
+                if qual != name:
+                    defs.setdefault(qual, []).append(loc)
+            for name, module, line in symbols["imports"]:
+                refs.setdefault(name, []).append((rel, line, "import", module))
+            for name, kind, line in symbols["refs"]:
+                refs.setdefault(name, []).append((rel, line, kind, ""))
+        self.defs_by_name = defs
+        self.refs_by_name = refs
+
+    def find_definitions(self, name: str) -> list[tuple]:
+        """Return [(path, start_line, end_line, kind, qualname, signature)] for name or qualname."""
+        return self.defs_by_name.get(name, [])
+
+    def find_references(self, name: str) -> list[tuple]:
+        """Return [(path, line, kind, detail)] for imports, calls and loads of name."""
+        return self.refs_by_name.get(name.rsplit(".", 1)[-1], [])
+
+    def repo_map(self, max_chars: int = MAX_REPO_MAP_CHARS) -> str:
+        """Return a compact outline: one line per Python file with its top-level classes/functions.
+
+        Line numbers are left out so edits that only shift code keep the outline (and the
+        cached prompt prefix it sits in) unchanged; find_symbol_tool returns the spans.
+        """
+        lines: list[str] = []
+        total = 0
+        view = self._view()
+        for rel in sorted(view):
+            symbols = view[rel]
+            top = [d for d in symbols["defs"] if "." not in d[1]]
+            methods: dict[str, list[str]] = {}
+            for d in symbols["defs"]:
+                if d[2] == "method" and d[1].count(".") == 1:
+                    methods.setdefault(d[1].split(".")[0], []).append(d[0])
+            parts = []
+            for name, _, kind, _, _, _ in top:
+                if kind == "class":
+                    members = methods.get(name, [])
+                    parts.append(f"class {name}" + (f"[{', '.join(members)}]" if members else ""))
+                else:
+                    parts.append(name)
+            line = f"{rel}: {', '.join(parts)}" if parts else rel
+            if total + len(line) > max_chars:
+                lines.append(f"... ({len(view) - len(lines)} more files)")
+                break
+            lines.append(line)
+            total += len(line) + 1
+        return "\n".join(lines)
+
+
+_indexes: dict[str, SymbolIndex] = {}
+
+
+def get_symbol_index(workspace_root: str) -> SymbolIndex:
+    """Return the up-to-date SymbolIndex for a workspace (cached per process, persisted on disk).
+
+    Staged edits pending review are indexed from their staged content.
+    """
+    from src.approvals import get_overlay
+    from src.cache_dir import workspace_cache_dir
+
+    key = str(Path(workspace_root or ".").resolve())
+    index = _indexes.get(key)
+    if index is None:
+        index = _indexes[key] = SymbolIndex(key, workspace_cache_dir(key, "symbols"))
+    overlay = get_overlay(key)
+    staged = {str(c.path.relative_to(index.root)): c.content for c in overlay.changes.values()} if overlay else None
+    index.update(staged)
+    return index
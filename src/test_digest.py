@@ -0,0 +1,242 @@
+"""Distill pytest/unittest output into compact structured failure digests.
+
+Prefers a JUnit XML report when one was written; otherwise parses the console output.
+Only stack frames inside the workspace are kept, and the full log stays off-prompt.
+"""
+
+import re
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+MAX_FAILURES = 10
+MAX_FRAMES = 3
+MAX_MESSAGE_CHARS = 300
+
+_PYTEST_SUMMARY_RE = re.compile(r"^(FAILED|ERROR) (\S+)(?: - (.*))?$")
+_PYTEST_SECTION_RE = re.compile(r"^_{3,} (.+?) _{3,}$")
+_PYTEST_COUNTS_RE = re.compile(
+    r"(\d+) (failed|passed|errors?|skipped|xfailed|xpassed|deselected)\b"
+)
+_PYTEST_FRAME_RE = re.compile(r"^([^\s:][^:]*\.py):(\d+):(?: in (\S+))?")
+_TRACEBACK_FRAME_RE = re.compile(r'File "(.+?)", line (\d+), in (\S+)')
+_UNITTEST_HEADER_RE = re.compile(r"^(FAIL|ERROR): (\S+) \((.+?)\)")
+_UNITTEST_RAN_RE = re.compile(r"^Ran (\d+) tests? in")
+_UNITTEST_RESULT_RE = re.compile(r"^(OK|FAILED)\b(?: \((.*)\))?")
+
+
+def looks_like_test_output(text: str) -> bool:
+    """Return True if text appears to come from pytest or unittest."""
+    return bool(
+        "short test summary info" in text
+        or re.search(r"^=+ .*\b(passed|failed|errors?|no tests ran)\b.* in [\d.]+s", text, re.M)
+        or re.search(r"^\d+ (passed|failed)\b.* in [\d.]+s", text, re.M)
+        or re.search(r"^Ran \d+ tests? in", text, re.M)
+    )
+
+
+def _workspace_frame(path: str, line: str, func: str | None, root: Path, base: Path) -> dict | None:
+    """Return a frame dict (file relative to root) if path is inside the workspace and not in site-packages.
+
+    Relative paths are resolved against base, the directory the test command ran in.
+    """
+    if "site-packages" in path or path.startswith("<"):
+        return None
+    p = Path(path)
+    full = (p if p.is_absolute() else base / p).resolve()
+    try:
+        rel = full.relative_to(root)
+    except ValueError:
+        return None
+    return {"file": str(rel), "line": int(line), "func": func or ""}
+
+
+def _frames(lines: list[str], root: Path, base: Path | None = None) -> list[dict]:
+    base = base or root
+    frames = []
+    for line in lines:
+        m = _TRACEBACK_FRAME_RE.search(line)
+        if m:
+            frame = _workspace_frame(m.group(1), m.group(2), m.group(3), root, base)
+        else:
+            m = _PYTEST_FRAME_RE.match(line)
+            frame = _workspace_frame(m.group(1), m.group(2), m.group(3), root, base) if m else None
+        if frame and frame not in frames:
+            frames.append(frame)
+    return frames[-MAX_FRAMES:]
+
+
+def _rebase_id(test_id: str, root: Path, base: Path) -> str:
+    """Make a node id printed relative to base (the command's cwd) relative to root instead."""
+    if base == root:
+        return test_id
+    path, sep, rest = test_id.partition("::")
+    try:
+        return str((base / path).resolve().relative_to(root)) + sep + rest
+    except ValueError:
+        return test_id
+
+
+def _clip(message: str) -> str:
+    message = " ".join(message.split())
+    return message[:MAX_MESSAGE_CHARS] + ("…" if len(message) > MAX_MESSAGE_CHARS else "")
+
+
+def parse_pytest_output(text: str, workspace_root: str = ".", cwd: str | None = None) -> dict:
+    """Parse pytest console output into {framework, counts, failures[{id, message, frames}]}.
+
+    cwd is the directory pytest ran in, if not the workspace root; paths are reported relative to the root.
+    """
+    root = Path(workspace_root or ".").resolve()
+    base = Path(cwd).resolve() if cwd else root
+    lines = text.splitlines()
+    sections: dict[str, list[str]] = {}
+    current: str | None = None
+    failures: list[dict] = []
+    for line in lines:
+        header = _PYTEST_SECTION_RE.match(line)
+        if header:
+            current = header.group(1)
+            sections[current] = []
+            continue
+        if line.startswith("====="):
+            current = None
+            continue
+        if current is not None:
+            sections[current].append(line)
+        m = _PYTEST_SUMMARY_RE.match(line)
+        if m:
+            failures.append({"id": m.group(2), "kind": m.group(1).lower(), "message": m.group(3) or "", "frames": []})
+    for failure in failures:
+        test_id = failure["id"]
+        name = test_id.split("::", 1)[-1].replace("::", ".")
+        body = sections.get(name) or sections.get(f"ERROR collecting {test_id}") or []
+        failure["frames"] = _frames(body, root, base)
+        failure["id"] = _rebase_id(test_id, root, base)
+        e_lines = [ln[1:].strip() for ln in body if ln.startswith("E ")]
+        if e_lines and not failure["message"]:
+            failure["message"] = " ".join(e_lines[:3])
+        failure["message"] = _clip(failure["message"])
+    counts: dict[str, int] = {}
+    for line in reversed(lines):
+        found = _PYTEST_COUNTS_RE.findall(line)
+        if found and (" in " in line or line.startswith("=")):
+            for n, kind in found:
+                counts["errors" if kind.startswith("error") else kind] = int(n)
+            break
+    return {"framework": "pytest", "counts": counts, "failures": failures}
+
+
+def parse_unittest_output(text: str, workspace_root: str = ".", cwd: str | None = None) -> dict:
+    """Parse unittest console output into {framework, counts, failures[{id, message, frames}]}."""
+    root = Path(workspace_root or ".").resolve()
+    base = Path(cwd).resolve() if cwd else root
+    lines = text.splitlines()
+    failures: list[dict] = []
+    counts: dict[str, int] = {}
+    i = 0
+    while i < len(lines):
+        m = _UNITTEST_HEADER_RE.match(lines[i])
+        if m:
+            body: list[str] = []
+            i += 1
+            while i < len(lines) and not lines[i].startswith("=" * 10):
+                if lines[i].startswith("-" * 10) and body:
+                    break
+                body.append(lines[i])
+                i += 1
+            detail = [ln for ln in body if ln.strip() and not ln.startswith((" ", "-", "Traceback"))]
+            failures.append({
+                "id": m.group(3),
+                "kind": "failed" if m.group(1) == "FAIL" else "error",
+                "message": _clip(detail[-1] if detail else ""),
+                "frames": _frames(body, root, base),
+            })
+            continue
+        ran = _UNITTEST_RAN_RE.match(lines[i])
+        if ran:
+            counts["tests"] = int(ran.group(1))
+        result = _UNITTEST_RESULT_RE.match(lines[i])
+        if result and result.group(2):
+            for part in result.group(2).split(","):
+                key, _, n = part.strip().partition("=")
+                if n.isdigit():
+                    counts[key] = int(n)
+        i += 1
+    return {"framework": "unittest", "counts": counts, "failures": failures}
+
+
+def _junit_test_id(classname: str, name: str, root: Path) -> str:
+    """Map JUnit classname (dotted module[.Class]) + name to a pytest-style node id."""
+    parts = classname.split(".") if classname else []
+    for cut in range(len(parts), 0, -1):
+        candidate = Path(*parts[:cut]).with_suffix(".py")
+        if (root / candidate).is_file():
+            return "::".join([str(candidate), *parts[cut:], name])
+    return "::".join([*(p for p in [classname] if p), name])
+
+
+def parse_junit_xml(path: str | Path, workspace_root: str = ".") -> dict | None:
+    """Parse a JUnit XML report. Returns None if the file is missing or unreadable."""
+    root = Path(workspace_root or ".").resolve()
+    try:
+        tree = ET.parse(path)
+    except (OSError, ET.ParseError):
+        return None
+    counts = {"tests": 0, "failures": 0, "errors": 0, "skipped": 0}
+    failures: list[dict] = []
+    for suite in tree.getroot().iter("testsuite"):
+        for key in counts:
+            counts[key] += int(suite.get(key) or 0)
+    for case in tree.getroot().iter("testcase"):
+        for child in case:
+            if child.tag not in ("failure", "error"):
+                continue
+            text = child.text or ""
+            message = (child.get("message") or "").strip()
+            if not message and text.strip():
+                message = text.strip().splitlines()[-1]
+            failures.append({
+                "id": _junit_test_id(case.get("classname") or "", case.get("name") or "", root),
+                "kind": "failed" if child.tag == "failure" else "error",
+                "message": _clip(message),
+                "frames": _frames(text.splitlines(), root),
+            })
+    counts["passed"] = max(0, counts["tests"] - counts["failures"] - counts["errors"] - counts["skipped"])
+    return {"framework": "junit", "counts": counts, "failures": failures}
+
+
+def distill(
+    output: str,
+    workspace_root: str = ".",
+    junit_xml: str | Path | None = None,
+    cwd: str | None = None,
+) -> dict:
+    """Return a structured digest, preferring the JUnit report over console parsing.
+
+    File paths in the digest are relative to workspace_root; cwd is where the command ran
+    (defaults to the root), used to resolve the relative paths the test runner printed.
+    """
+    digest = parse_junit_xml(junit_xml, workspace_root) if junit_xml else None
+    if digest is not None:
+        return digest
+    if _UNITTEST_HEADER_RE.search(output) or re.search(r"^Ran \d+ tests? in", output, re.M):
+        return parse_unittest_output(output, workspace_root, cwd)
+    return parse_pytest_output(output, workspace_root, cwd)
+
+
+def format_digest(digest: dict, log_id: str | None = None) -> str:
+    """Render a digest as a few compact lines for the prompt."""
+    counts = ", ".join(f"{v} {k}" for k, v in digest.get("counts", {}).items() if v)
+    lines = [f"{digest.get('framework', 'tests')}: {counts or 'no results parsed'}"]
+    failures = digest.get("failures") or []
+    for failure in failures[:MAX_FAILURES]:
+        kind = "FAILED" if failure["kind"] == "failed" else "ERROR"
+        lines.append(f"{kind} {failure['id']}" + (f": {failure['message']}" if failure["message"] else ""))
+        for frame in failure["frames"]:
+            where = f" in {frame['func']}" if frame["func"] else ""
+            lines.append(f"  at {frame['file']}:{frame['line']}{where}")
+    if len(failures) > MAX_FAILURES:
+        lines.append(f"... ({len(failures) - MAX_FAILURES} more failures)")
+    if log_id:
+        lines.append(f"(full log: read_log_tool log_id={log_id})")
+    return "\n".join(lines)
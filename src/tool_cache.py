@@ -0,0 +1,111 @@
+"""Session-scoped memoization of read-only tool results with mtime-snapshot invalidation."""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+from src.approvals import get_overlay
+
+# Read-only tools whose output depends only on their arguments and the files they read.
+CACHEABLE_TOOLS = ("read_file_tool", "grep_tool")
+# Tools that modify a single file given by their file_path argument.
+WRITE_TOOLS = ("search_replace_tool", "write_file_tool")
+
+
+def cache_mode() -> str:
+    """AGENT_TOOL_CACHE: "on" (default, repeat full output), "ref" (short reference on hit) or "off"."""
+    mode = os.environ.get("AGENT_TOOL_CACHE", "on").lower()
+    return mode if mode in ("on", "ref", "off") else "on"
+
+
+def _stat(path: Path) -> tuple[int, int] | None:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class ToolResultCache:
+    """Per-session cache keyed by (tool name, arguments).
+
+    Each entry keeps a snapshot of (mtime_ns, size) for every file the result depends on.
+    A hit is served only if the snapshot still matches, so edits made by any tool (including
+    run_shell_tool) invalidate it; write tools also evict entries for their path immediately.
+    ToolNode runs one message's tool calls in parallel threads, so entry updates take a lock.
+    """
+
+    def __init__(self, workspace_root: str):
+        self.root = Path(workspace_root or ".").resolve()
+        self.mode = cache_mode()
+        self.session: str | None = None
+        self.hits = 0
+        self._entries: dict[tuple[str, str], tuple[str, dict[str, tuple[int, int] | None]]] = {}
+        self._lock = threading.Lock()
+
+    def reset(self, session: str | None = None) -> None:
+        """Drop all entries and start a new session."""
+        with self._lock:
+            self.session = session
+            self.hits = 0
+            self._entries.clear()
+
+    def begin_turn(self, session: str | None = None) -> None:
+        """Call once per tools-node run; drops all entries when a new session (run) starts."""
+        if session != self.session:
+            self.reset(session)
+
+    @staticmethod
+    def key(tool_name: str, kwargs: dict) -> tuple[str, str]:
+        args = {k: v for k, v in kwargs.items() if k != "workspace_root"}
+        return (tool_name, json.dumps(args, sort_keys=True, default=str))
+
+    def snapshot(self, tool_name: str, kwargs: dict) -> dict[str, tuple[int, int] | None]:
+        """Return {abs_path: (mtime_ns, size) or None} for the files the call depends on.
+
+        Staged edits do not touch mtimes, so the overlay version is part of the snapshot.
+        """
+        overlay = get_overlay(str(self.root))
+        snap: dict[str, tuple[int, int] | None] = {"<overlay>": (overlay.version, 0)} if overlay else {}
+        if tool_name == "read_file_tool":
+            path = (self.root / kwargs.get("file_path", "")).resolve()
+            snap[str(path)] = _stat(path)
+            return snap
+        search_path = (self.root / kwargs.get("path", ".")).resolve()
+        if not search_path.is_dir():
+            snap[str(search_path)] = _stat(search_path)
+            return snap
+        snap.update((str(f), _stat(f)) for f in search_path.rglob("*") if f.is_file())
+        return snap
+
+    def get(self, tool_name: str, kwargs: dict) -> str | None:
+        """Return the cached result if none of its files changed, else None."""
+        key = self.key(tool_name, kwargs)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        result, snapshot = entry
+        if self.snapshot(tool_name, kwargs) != snapshot:
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            return None
+        with self._lock:
+            self.hits += 1
+        return result
+
+    def put(self, tool_name: str, kwargs: dict, result: str, snapshot: dict[str, tuple[int, int] | None]) -> None:
+        """Store result with the snapshot taken *before* the tool ran (so a concurrent edit is never masked)."""
+        with self._lock:
+            self._entries[self.key(tool_name, kwargs)] = (result, snapshot)
+
+    def invalidate_path(self, file_path: str) -> None:
+        """Evict every entry whose snapshot includes file_path (relative to the workspace).
+
+        Newly created files need no eviction: they change the grep snapshot's file set.
+        """
+        target = str((self.root / file_path).resolve())
+        with self._lock:
+            for k in [k for k, (_, snapshot) in self._entries.items() if target in snapshot]:
+                del self._entries[k]
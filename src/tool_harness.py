@@ -1,25 +1,72 @@
 """Tool harness: build workspace-bound tools and ToolNode for the graph."""
 
+import time
 from typing import TYPE_CHECKING
 
 from langchain_core.tools import StructuredTool
 from langgraph.prebuilt import ToolNode
 
+from src.tool_cache import CACHEABLE_TOOLS, WRITE_TOOLS, ToolResultCache
 from src.tools.grep import grep_tool
+from src.tools.logs import read_log_tool
 from src.tools.read_file import read_file_tool
 from src.tools.shell import run_shell_tool
 from src.tools.search_replace import search_replace_tool
+from src.tools.symbols import find_references_tool, find_symbol_tool
 from src.tools.write_file import write_file_tool
 
 if TYPE_CHECKING:
     from langchain_core.tools import BaseTool
 
 
-def _bind_workspace(tool: "BaseTool", workspace: str) -> "BaseTool":
-    """Wrap a tool so that workspace_root is always set to workspace when invoked."""
-    def invoker(**kwargs):
+def _format_args(tool: "BaseTool", kwargs: dict) -> str:
+    """Render call arguments as the model wrote them: no bound workspace_root, no filled-in defaults."""
+    fields = getattr(tool.args_schema, "model_fields", {})
+    return ", ".join(
+        f"{k}={v!r}"
+        for k, v in kwargs.items()
+        if k != "workspace_root" and not (k in fields and fields[k].default == v)
+    )
+
+
+def _bind_workspace(
+    tool: "BaseTool",
+    workspace: str,
+    cache: ToolResultCache | None = None,
+    timings: list[tuple[str, float]] | None = None,
+) -> "BaseTool":
+    """Wrap a tool so that workspace_root is always set to workspace when invoked.
+
+    With a cache, read-only tools are memoized per session and write tools evict the
+    entries for the file they touched. With timings, each call appends (tool name, ms).
+    """
+    def _invoke(kwargs):
         kwargs["workspace_root"] = workspace
-        return tool.invoke(kwargs)
+        if cache is None or cache.mode == "off":
+            return tool.invoke(kwargs)
+        if tool.name in CACHEABLE_TOOLS:
+            hit = cache.get(tool.name, kwargs)
+            if hit is not None:
+                if cache.mode == "ref":
+                    return f"(unchanged: same result as your earlier {tool.name} call with {_format_args(tool, kwargs)})"
+                return hit
+            snapshot = cache.snapshot(tool.name, kwargs)
+            result = tool.invoke(kwargs)
+            cache.put(tool.name, kwargs, result, snapshot)
+            return result
+        result = tool.invoke(kwargs)
+        if tool.name in WRITE_TOOLS:
+            cache.invalidate_path(kwargs.get("file_path", ""))
+        return result
+
+    def invoker(**kwargs):
+        if timings is None:
+            return _invoke(kwargs)
+        start = time.perf_counter()
+        try:
+            return _invoke(kwargs)
+        finally:
+            timings.append((tool.name, (time.perf_counter() - start) * 1000))
     return StructuredTool.from_function(
         func=invoker,
         name=tool.name,
@@ -28,18 +75,30 @@ def _bind_workspace(tool: "BaseTool", workspace: str) -> "BaseTool":
     )
 
 
-def get_tools(workspace_root: str) -> list["BaseTool"]:
+def get_tools(
+    workspace_root: str,
+    cache: ToolResultCache | None = None,
+    timings: list[tuple[str, float]] | None = None,
+) -> list["BaseTool"]:
     """Return tools with workspace_root bound (for use in the graph)."""
     root = workspace_root or "."
-    return [
-        _bind_workspace(grep_tool, root),
-        _bind_workspace(read_file_tool, root),
-        _bind_workspace(search_replace_tool, root),
-        _bind_workspace(write_file_tool, root),
-        _bind_workspace(run_shell_tool, root),
+    tools = [
+        grep_tool,
+        read_file_tool,
+        search_replace_tool,
+        write_file_tool,
+        run_shell_tool,
+        find_symbol_tool,
+        find_references_tool,
+        read_log_tool,
     ]
+    return [_bind_workspace(t, root, cache, timings) for t in tools]
 
 
-def get_tool_node(workspace_root: str) -> ToolNode:
+def get_tool_node(
+    workspace_root: str,
+    cache: ToolResultCache | None = None,
+    timings: list[tuple[str, float]] | None = None,
+) -> ToolNode:
     """Return a ToolNode that runs the workspace-bound tools."""
-    return ToolNode(get_tools(workspace_root))
+    return ToolNode(get_tools(workspace_root, cache, timings))
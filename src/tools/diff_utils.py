@@ -118,6 +118,7 @@ def ask_user_confirmation(
     diff_output: str,
     action_description: str,
     default: bool = True,
+    tty_only: bool = False,
 ) -> bool:
     """Display a diff and ask the user for confirmation before applying changes.
 
@@ -125,6 +126,8 @@ def ask_user_confirmation(
         diff_output: The formatted diff to display
         action_description: Description of what will happen if confirmed
         default: Default response if user just presses Enter
+        tty_only: Never fall back to stdin (it may carry other input, e.g. worker requests);
+            without /dev/tty, or on an invalid reply, reject instead of using the default
 
     Returns:
         True if user confirms, False otherwise
@@ -156,6 +159,9 @@ def ask_user_confirmation(
                 response = tty.readline().strip().lower()
                 print(f"{Colors.CYAN}[DEBUG] Got response from /dev/tty: '{response}'{Colors.RESET}")
         except (OSError, IOError) as e:
+            if tty_only:
+                print(f"{Colors.RED}/dev/tty not available ({e}): rejecting changes{Colors.RESET}")
+                return False
             print(f"{Colors.CYAN}[DEBUG] /dev/tty not available ({e}), using stdin{Colors.RESET}")
             # Fall back to regular input if /dev/tty is not available
             response = input(f"\n{Colors.BOLD}Apply these changes? [{default_str}]: {Colors.RESET}").strip().lower()
@@ -170,6 +176,9 @@ def ask_user_confirmation(
         elif response in ('n', 'no'):
             print(f"{Colors.RED}User declined: rejecting changes{Colors.RESET}")
             return False
+        elif tty_only:
+            print(f"{Colors.RED}Invalid response '{response}': rejecting changes{Colors.RESET}")
+            return False
         else:
             print(f"{Colors.YELLOW}Invalid response '{response}', using default: {'yes' if default else 'no'}{Colors.RESET}")
             return default
@@ -5,6 +5,8 @@ from pathlib import Path
 
 from langchain_core.tools import tool
 
+from src.approvals import get_overlay
+
 
 @tool
 def grep_tool(
@@ -27,11 +29,17 @@ def grep_tool(
         # Fallback to substring search
         regex = None
     results: list[str] = []
-    for f in search_path.rglob("*"):
-        if not f.is_file():
-            continue
+    overlay = get_overlay(workspace_root)
+    files = [f for f in search_path.rglob("*") if f.is_file()]
+    if overlay:
+        # Staged new files are not on disk yet but must be searchable
+        on_disk = set(files)
+        files += sorted(p for p in overlay.staged_paths() if p not in on_disk and search_path in p.parents)
+    for f in files:
+        text = overlay.get(f) if overlay else None
         try:
-            text = f.read_text(encoding="utf-8", errors="replace")
+            if text is None:
+                text = f.read_text(encoding="utf-8", errors="replace")
         except Exception as e:
             results.append(f"{f.relative_to(root)}: (read error: {e})")
             continue
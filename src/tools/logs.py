@@ -0,0 +1,25 @@
+"""Fetch full command logs that were kept out of the prompt."""
+
+from langchain_core.tools import tool
+
+from src.log_store import load_log
+
+MAX_LOG_LINES = 200
+
+
+@tool
+def read_log_tool(log_id: str, start_line: int = 1, end_line: int = 0, workspace_root: str = ".") -> str:
+    """Read a full test/shell log stored off-prompt. log_id comes from a digest line like
+    "(full log: read_log_tool log_id=...)". Returns at most 200 lines per call; use
+    start_line/end_line (1-based, inclusive) to page through it.
+    """
+    text = load_log(workspace_root, log_id)
+    if text is None:
+        return f"error: log not found: {log_id}"
+    lines = text.splitlines()
+    start = max(start_line, 1)
+    end = min(end_line if end_line > 0 else len(lines), start + MAX_LOG_LINES - 1)
+    body = "\n".join(lines[start - 1:end])
+    if end < len(lines):
+        body += f"\n... (lines {end + 1}-{len(lines)} not shown)"
+    return body
@@ -4,19 +4,31 @@ from pathlib import Path
 
 from langchain_core.tools import tool
 
+from src.approvals import read_staged
+
 
 @tool
-def read_file_tool(file_path: str, workspace_root: str = ".") -> str:
+def read_file_tool(file_path: str, workspace_root: str = ".", start_line: int = 0, end_line: int = 0) -> str:
     """Read the contents of a file. file_path is relative to workspace_root.
     Use this before editing so you have the exact text for search_replace.
+    Optionally pass start_line/end_line (1-based, inclusive) to read only a span,
+    e.g. the one returned by find_symbol_tool.
     """
     root = Path(workspace_root).resolve()
     full_path = (root / file_path).resolve()
-    if not full_path.exists():
-        return f"error: file not found: {file_path}"
-    if not full_path.is_file():
-        return f"error: not a file: {file_path}"
-    try:
-        return full_path.read_text(encoding="utf-8", errors="replace")
-    except Exception as e:
-        return f"error: could not read file: {e}"
+    text = read_staged(workspace_root, full_path)
+    if text is None:
+        if not full_path.exists():
+            return f"error: file not found: {file_path}"
+        if not full_path.is_file():
+            return f"error: not a file: {file_path}"
+        try:
+            text = full_path.read_text(encoding="utf-8", errors="replace")
+        except Exception as e:
+            return f"error: could not read file: {e}"
+    if start_line > 0 or end_line > 0:
+        lines = text.splitlines(keepends=True)
+        start = max(start_line, 1)
+        end = end_line if end_line > 0 else len(lines)
+        return "".join(lines[start - 1:end])
+    return text
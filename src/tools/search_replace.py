@@ -4,7 +4,7 @@ from pathlib import Path
 
 from langchain_core.tools import tool
 
-from src.tools.diff_utils import ask_user_confirmation, generate_diff
+from src.approvals import read_staged, submit_change
 
 
 @tool
@@ -22,14 +22,20 @@ def search_replace_tool(
     """
     root = Path(workspace_root).resolve()
     full_path = (root / file_path).resolve()
-    if not full_path.exists():
-        return f"error: file not found: {file_path}"
-    if not full_path.is_file():
-        return f"error: not a file: {file_path}"
     try:
-        content = full_path.read_text(encoding="utf-8", errors="replace")
-    except Exception as e:
-        return f"error: could not read file: {e}"
+        full_path.relative_to(root)
+    except ValueError:
+        return f"error: file path must be inside workspace: {file_path}"
+    content = read_staged(workspace_root, full_path)
+    if content is None:
+        if not full_path.exists():
+            return f"error: file not found: {file_path}"
+        if not full_path.is_file():
+            return f"error: not a file: {file_path}"
+        try:
+            content = full_path.read_text(encoding="utf-8", errors="replace")
+        except Exception as e:
+            return f"error: could not read file: {e}"
     if old_string not in content:
         return "attempted: old_string not found in file (patch not applied)"
     if replace_all:
@@ -37,15 +43,9 @@ def search_replace_tool(
     else:
         new_content = content.replace(old_string, new_string, 1)
 
-    # Generate and display diff, ask for user confirmation
-    diff_output = generate_diff(content, new_content, file_path)
+    # Show the diff and confirm, auto-approve, or stage it, depending on the approval policy
     action_desc = f"Replace {'all occurrences' if replace_all else 'first occurrence'} in {file_path}"
-
-    if not ask_user_confirmation(diff_output, action_desc):
-        return "rejected: user declined the changes"
-
-    try:
-        full_path.write_text(new_content, encoding="utf-8")
-    except Exception as e:
-        return f"error: could not write file: {e}"
-    return "applied: patch written successfully"
+    return submit_change(
+        workspace_root, file_path, full_path, content, new_content, action_desc,
+        "applied: patch written successfully",
+    )
@@ -2,6 +2,13 @@
 
 from langchain_core.tools import tool
 
+from src.approvals import absorb_execution_changes, execution_dir
+from src.log_store import save_log
+from src.test_digest import distill, format_digest, looks_like_test_output
+
+
+DIGEST_MIN_CHARS = 1500
+
 
 def _get_sandbox_run():
     """Lazy import to avoid circular dependency."""
@@ -15,12 +22,27 @@ def run_shell_tool(
     cwd: str = ".",
     workspace_root: str = ".",
 ) -> str:
-    """Run a shell command in the workspace directory. Use for builds and tests (e.g. pytest, npm test)."""
+    """Run a shell command in the workspace directory. Use for builds and tests (e.g. pytest, npm test).
+    Long pytest/unittest output is returned as a failure digest; the full log can be fetched with read_log_tool.
+    While edits are staged for review, commands run in a copy of the workspace that includes them;
+    files the command creates or modifies there are staged as well (reviewed with the other edits),
+    while deletions, non-text files and files edited meanwhile are not carried over and are listed in the result.
+    """
     from pathlib import Path
     root = Path(workspace_root).resolve()
-    work_dir = (root / cwd).resolve() if cwd != "." else root
+    exec_root = execution_dir(workspace_root)
+    work_dir = (exec_root / cwd).resolve() if cwd != "." else exec_root
     run_command = _get_sandbox_run()
     result = run_command(command, cwd=str(work_dir))
     output = result.get("output", "")
     passed = result.get("passed", False)
-    return f"exit_ok={passed}\n{output}"
+    staged, skipped = absorb_execution_changes(workspace_root, exec_root)
+    if len(output) > DIGEST_MIN_CHARS and looks_like_test_output(output):
+        log_id = save_log(str(root), output)
+        output = format_digest(distill(output, str(exec_root), cwd=str(work_dir)), log_id)
+    notes = ""
+    if staged:
+        notes += f"\nstaged from this command: {', '.join(staged)}"
+    if skipped:
+        notes += f"\nnot carried over from the staged copy (deleted, not text, or also edited while it ran): {', '.join(skipped)}"
+    return f"exit_ok={passed}\n{output}{notes}"
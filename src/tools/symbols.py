@@ -0,0 +1,34 @@
+"""Symbol lookup tools backed by the cached repository symbol map."""
+
+from langchain_core.tools import tool
+
+from src.symbol_index import MAX_LOCATIONS, get_symbol_index
+
+
+@tool
+def find_symbol_tool(name: str, workspace_root: str = ".") -> str:
+    """Find where a Python class/function/method is defined. name may be a bare name or
+    a qualified name like "MyClass.method". Returns file:start-end with kind and signature.
+    Prefer this over grep_tool for locating definitions; then read_file the returned span.
+    """
+    index = get_symbol_index(workspace_root)
+    locations = index.find_definitions(name)
+    if not locations:
+        return f"No definition found for '{name}'"
+    lines = [f"{path}:{start}-{end}: {kind} {qual} — {sig}" for path, start, end, kind, qual, sig in locations]
+    more = f"\n... ({len(lines) - MAX_LOCATIONS} more)" if len(lines) > MAX_LOCATIONS else ""
+    return "\n".join(lines[:MAX_LOCATIONS]) + more
+
+
+@tool
+def find_references_tool(name: str, workspace_root: str = ".") -> str:
+    """Find imports, call sites and other uses of a Python name across the workspace.
+    Returns file:line with the kind of reference (import, call, name, attr).
+    """
+    index = get_symbol_index(workspace_root)
+    locations = index.find_references(name)
+    if not locations:
+        return f"No references found for '{name}'"
+    lines = [f"{path}:{line}: {kind}" + (f" {detail}" if detail else "") for path, line, kind, detail in locations]
+    more = f"\n... ({len(lines) - MAX_LOCATIONS} more)" if len(lines) > MAX_LOCATIONS else ""
+    return "\n".join(lines[:MAX_LOCATIONS]) + more
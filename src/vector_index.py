@@ -0,0 +1,212 @@
+"""Local vector index for semantic code retrieval (requires numpy; no external services).
+
+Chunk vectors live in a memory-mapped float32 matrix next to a small JSON manifest.
+Only files whose size/mtime (and then content hash) changed are re-embedded; their old
+rows are freed and reused. Queries score all rows with batched matrix products.
+"""
+
+import hashlib
+import json
+import os
+import re
+import zlib
+from pathlib import Path
+from typing import Protocol
+
+import numpy as np
+
+from src.workspace_files import walk_files
+
+INDEXED_EXTENSIONS = (".py", ".md", ".txt")
+CHUNK_LINES = 30
+CHUNK_STRIDE = 20
+QUERY_BATCH_ROWS = 4096
+INITIAL_CAPACITY = 256
+
+_TOKEN_RE = re.compile(r"[A-Za-z][A-Za-z0-9]*")
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+
+class Embedder(Protocol):
+    """Pluggable embedder: maps texts to L2-normalized float32 row vectors."""
+
+    name: str
+    dim: int
+
+    def embed(self, texts: list[str]) -> np.ndarray: ...
+
+
+def _tokens(text: str) -> list[str]:
+    """Split text into lowercase word tokens, breaking snake_case and camelCase identifiers."""
+    out: list[str] = []
+    for word in _TOKEN_RE.findall(text):
+        parts = _CAMEL_RE.findall(word)
+        out.extend(p.lower() for p in parts if len(p) > 1)
+    return out
+
+
+class HashingEmbedder:
+    """Offline default: signed feature hashing of word unigrams and bigrams."""
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.name = f"hashing-v1-{dim}"
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            toks = _tokens(text)
+            feats = toks + [f"{a} {b}" for a, b in zip(toks, toks[1:])]
+            for feat in feats:
+                h = zlib.crc32(feat.encode("utf-8"))
+                out[i, h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return out / norms
+
+
+def chunk_text(text: str) -> list[tuple[int, int, str]]:
+    """Split text into overlapping line windows. Returns [(start_line, end_line, chunk)] (1-based)."""
+    lines = text.splitlines()
+    if not lines:
+        return []
+    chunks = []
+    for start in range(0, len(lines), CHUNK_STRIDE):
+        window = lines[start:start + CHUNK_LINES]
+        chunks.append((start + 1, start + len(window), "\n".join(window)))
+        if start + CHUNK_LINES >= len(lines):
+            break
+    return chunks
+
+
+class VectorIndex:
+    """Incrementally maintained chunk index for one workspace."""
+
+    def __init__(self, workspace_root: str, cache_dir: Path, embedder: Embedder | None = None):
+        self.root = Path(workspace_root or ".").resolve()
+        self.cache_dir = Path(cache_dir)
+        self.embedder = embedder or HashingEmbedder()
+        self._matrix_path = self.cache_dir / "vectors.f32"
+        self._manifest_path = self.cache_dir / "manifest.json"
+        self._load()
+
+    # -- persistence -------------------------------------------------------
+
+    def _load(self) -> None:
+        manifest = None
+        if self._manifest_path.is_file() and self._matrix_path.is_file():
+            try:
+                manifest = json.loads(self._manifest_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                manifest = None
+        if not manifest or manifest.get("embedder") != self.embedder.name:
+            manifest = {"embedder": self.embedder.name, "capacity": 0, "rows": [], "files": {}}
+            self._matrix_path.unlink(missing_ok=True)
+        self.capacity: int = manifest["capacity"]
+        self.rows: list[list | None] = manifest["rows"]
+        self.files: dict[str, dict] = manifest["files"]
+        self._matrix = self._open_matrix(self.capacity) if self.capacity else None
+
+    def _open_matrix(self, capacity: int) -> np.memmap:
+        mode = "r+" if self._matrix_path.is_file() else "w+"
+        return np.memmap(self._matrix_path, dtype=np.float32, mode=mode, shape=(capacity, self.embedder.dim))
+
+    def _grow(self, needed: int) -> None:
+        """Ensure capacity >= needed by doubling; existing rows are preserved in place."""
+        if needed <= self.capacity:
+            return
+        new_capacity = max(INITIAL_CAPACITY, self.capacity)
+        while new_capacity < needed:
+            new_capacity *= 2
+        if self._matrix is not None:
+            self._matrix.flush()
+            del self._matrix
+        with open(self._matrix_path, "ab") as f:
+            f.truncate(new_capacity * self.embedder.dim * 4)
+        self.capacity = new_capacity
+        self._matrix = self._open_matrix(new_capacity)
+
+    def _save(self) -> None:
+        if self._matrix is not None:
+            self._matrix.flush()
+        manifest = {"embedder": self.embedder.name, "capacity": self.capacity, "rows": self.rows, "files": self.files}
+        tmp = self._manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest), encoding="utf-8")
+        os.replace(tmp, self._manifest_path)
+
+    # -- updates -----------------------------------------------------------
+
+    def _free_rows(self, rel: str) -> None:
+        for row in self.files.get(rel, {}).get("rows", []):
+            self.rows[row] = None
+        self.files.pop(rel, None)
+
+    def _allocate(self, count: int) -> list[int]:
+        free = [i for i, r in enumerate(self.rows) if r is None][:count]
+        extra = count - len(free)
+        if extra:
+            start = len(self.rows)
+            self.rows.extend([None] * extra)
+            free.extend(range(start, start + extra))
+        self._grow(len(self.rows))
+        return free
+
+    def update(self) -> int:
+        """Re-embed changed files and drop deleted ones. Returns the number of files re-embedded."""
+        seen: set[str] = set()
+        changed = 0
+        for f in walk_files(self.root):
+            if f.suffix not in INDEXED_EXTENSIONS:
+                continue
+            rel = str(f.relative_to(self.root))
+            seen.add(rel)
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            entry = self.files.get(rel)
+            if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+                continue
+            try:
+                text = f.read_text(encoding="utf-8", errors="replace")
+            except Exception:
+                continue
+            digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+            if entry and entry["sha1"] == digest:
+                entry["mtime_ns"], entry["size"] = st.st_mtime_ns, st.st_size
+                continue
+            self._free_rows(rel)
+            chunks = chunk_text(text)
+            rows = self._allocate(len(chunks))
+            if chunks:
+                self._matrix[rows] = self.embedder.embed([c[2] for c in chunks])
+            for row, (start, end, _) in zip(rows, chunks):
+                self.rows[row] = [rel, start, end]
+            self.files[rel] = {"sha1": digest, "mtime_ns": st.st_mtime_ns, "size": st.st_size, "rows": rows}
+            changed += 1
+        for rel in [r for r in self.files if r not in seen]:
+            self._free_rows(rel)
+            changed += 1
+        self._save()
+        return changed
+
+    # -- queries -----------------------------------------------------------
+
+    def query(self, text: str, k: int = 10) -> list[tuple[float, str, int, int]]:
+        """Return top-k chunks as [(cosine, rel_path, start_line, end_line)], best first."""
+        n = len(self.rows)
+        if not n or self._matrix is None or not text.strip():
+            return []
+        q = self.embedder.embed([text])[0]
+        scores = np.full(n, -np.inf, dtype=np.float32)
+        for start in range(0, n, QUERY_BATCH_ROWS):
+            stop = min(n, start + QUERY_BATCH_ROWS)
+            scores[start:stop] = self._matrix[start:stop] @ q
+        valid = np.fromiter((r is not None for r in self.rows), dtype=bool, count=n)
+        scores[~valid] = -np.inf
+        k = min(k, int(valid.sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), *self.rows[i]) for i in top if scores[i] > 0]
@@ -0,0 +1,17 @@
+"""Workspace file walking shared by the symbol index, repo map and overlay shadow copy."""
+
+import os
+from pathlib import Path
+from typing import Iterator
+
+# Tool, VCS and environment directories: never part of the project's own files.
+SKIP_DIRS = (".git", "__pycache__", ".pytest_cache", ".mypy_cache", ".ruff_cache", ".venv", "venv", "node_modules")
+
+
+def walk_files(root: Path, suffix: str | None = None) -> Iterator[Path]:
+    """Yield files under root (optionally only those ending in suffix), pruning SKIP_DIRS."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+        for name in sorted(filenames):
+            if suffix is None or name.endswith(suffix):
+                yield Path(dirpath) / name